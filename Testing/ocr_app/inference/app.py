@@ -1,5 +1,10 @@
 import io
+import os
 import base64
+import queue
+import threading
+import time
+from concurrent.futures import Future
 import torch
 import torch.nn as nn
 import torchvision.transforms as transforms
@@ -26,28 +31,143 @@ class MNIST_CNN(nn.Module):
 
     def forward(self, x):
         x = self.conv_layer(x)
-        x = x.view(x.size(0), -1)
+        x = x.reshape(x.size(0), -1)  # not view: quantized convs return channels-last tensors
         x = self.fc_layer(x)
         return x
 
+def optimize_model(model, mode, device):
+    """
+    Returns the model prepared for serving in the given execution mode:
+    "eager" leaves it unchanged, "torchscript" traces and freezes it.
+    """
+    if mode == "eager":
+        return model
+    if mode != "torchscript":
+        raise ValueError(f"Unknown INFERENCE_MODE: {mode}")
+    example = torch.zeros(1, 1, 28, 28, device=device)
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(model, example).eval())
+        try:
+            scripted = torch.jit.optimize_for_inference(scripted)
+        except Exception as e:
+            print(f"optimize_for_inference unavailable, using frozen graph: {e}")
+        # Warm up so the profiling executor specializes before the first request
+        for _ in range(3):
+            scripted(example)
+    return scripted
+
+class QuantWrapper(nn.Module):
+    """Quantizes the input and dequantizes the output of a statically quantized model."""
+    def __init__(self, model):
+        super(QuantWrapper, self).__init__()
+        self.quant = torch.ao.quantization.QuantStub()
+        self.model = model
+        self.dequant = torch.ao.quantization.DeQuantStub()
+
+    def forward(self, x):
+        return self.dequant(self.model(self.quant(x)))
+
+def quantize_model(model, mode, calibration=None):
+    """
+    Returns an int8 copy of an fp32 MNIST_CNN (CPU only):
+    "dynamic" quantizes the fc_layer Linear layers with weights stored as int8
+    and activations quantized on the fly; "static" also quantizes the conv
+    stack, calibrating activation ranges on the given (N, 1, 28, 28) tensor.
+    """
+    import copy
+    if mode == "none":
+        return model
+    if mode == "dynamic":
+        return torch.ao.quantization.quantize_dynamic(copy.deepcopy(model), {nn.Linear}, dtype=torch.qint8)
+    if mode != "static":
+        raise ValueError(f"Unknown QUANTIZATION: {mode}")
+    if calibration is None:
+        raise ValueError("static quantization needs calibration data")
+
+    fused = torch.ao.quantization.fuse_modules(
+        copy.deepcopy(model).eval(),
+        [["conv_layer.0", "conv_layer.1"], ["conv_layer.3", "conv_layer.4"], ["fc_layer.0", "fc_layer.1"]]
+    )
+    wrapped = QuantWrapper(fused).eval()
+    wrapped.qconfig = torch.ao.quantization.get_default_qconfig(torch.backends.quantized.engine)
+    prepared = torch.ao.quantization.prepare(wrapped)
+    with torch.no_grad():
+        for start in range(0, len(calibration), 64):
+            prepared(calibration[start:start + 64])
+    return torch.ao.quantization.convert(prepared)
+
+# CPU threading and execution mode (set per instance by the platform, so
+# several instances on one host do not oversubscribe the cores)
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "eager")
+# int8 serving: "none", "dynamic" or "static" (calibrated on calibration.pt,
+# an (N, 1, 28, 28) tensor of normalized MNIST images shipped with the weights;
+# regenerate it with benchmarks/ocr_quantization_report.py --write-calibration)
+QUANTIZATION = os.environ.get("QUANTIZATION", "none")
+CALIBRATION_PATH = os.environ.get("CALIBRATION_PATH", "calibration.pt")
+if os.environ.get("TORCH_NUM_THREADS"):
+    torch.set_num_threads(int(os.environ["TORCH_NUM_THREADS"]))
+if os.environ.get("TORCH_NUM_INTEROP_THREADS"):
+    torch.set_num_interop_threads(int(os.environ["TORCH_NUM_INTEROP_THREADS"]))
+
 # Initialize the Flask app
 app = Flask(__name__)
 
 # Set up device: use GPU if available, otherwise CPU
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-# Initialize and load the model
-model = MNIST_CNN().to(device)
-model_state_path = "mnist_cnn.pt"
+def load_model(state_path, device, mmap=False):
+    """
+    Builds MNIST_CNN from a state dict. With mmap, the weights stay in the
+    memory-mapped file (shared through the page cache by every instance on
+    the host that maps it) instead of being copied into new parameters.
+    """
+    if mmap and device.type == "cpu":
+        try:
+            state = torch.load(state_path, map_location="cpu", mmap=True, weights_only=True)
+            with torch.device("meta"):
+                model = MNIST_CNN()
+            model.load_state_dict(state, assign=True)
+            return model
+        except Exception as e:
+            print(f"Could not mmap weights from {state_path}, loading a private copy: {e}")
+    model = MNIST_CNN().to(device)
+    model.load_state_dict(torch.load(state_path, map_location=device))
+    return model
+
+# Initialize and load the model. The platform may point MODEL_WEIGHTS_PATH at
+# a host-wide read-only copy of the weights and enable WEIGHTS_MMAP.
+model_state_path = os.environ.get("MODEL_WEIGHTS_PATH", "mnist_cnn.pt")
+WEIGHTS_MMAP = os.environ.get("WEIGHTS_MMAP", "0") == "1"
 try:
-    model.load_state_dict(torch.load(model_state_path, map_location=device))
+    model = load_model(model_state_path, device, mmap=WEIGHTS_MMAP)
     model.eval()  # set to evaluation mode
     print(f"Model loaded successfully from {model_state_path}")
 except Exception as e:
     print(f"Error loading model from {model_state_path}: {e}")
     model = None
 
-# Define the image transformations (same as used during training)
+# A requested int8 mode that cannot be applied stops the instance instead of
+# serving fp32 under an int8 label
+if model is not None and QUANTIZATION != "none":
+    if device.type != "cpu":
+        raise RuntimeError(f"QUANTIZATION={QUANTIZATION} needs a CPU device: quantized kernels are CPU only")
+    calibration = None
+    if QUANTIZATION == "static":
+        if not os.path.exists(CALIBRATION_PATH):
+            raise RuntimeError(f"QUANTIZATION=static needs calibration data, {CALIBRATION_PATH} not found")
+        calibration = torch.load(CALIBRATION_PATH, map_location="cpu")
+    model = quantize_model(model, QUANTIZATION, calibration)
+    print(f"Serving {QUANTIZATION} int8 quantized model")
+
+if model is not None:
+    try:
+        model = optimize_model(model, INFERENCE_MODE, device)
+        print(f"Serving in {INFERENCE_MODE} mode with {torch.get_num_threads()} intra-op threads")
+    except Exception as e:
+        print(f"Could not prepare {INFERENCE_MODE} model, serving eager: {e}")
+
+# Image transformations used during training. Requests are preprocessed with
+# the equivalent preprocess_batch(); this stays as the reference implementation.
 transform = transforms.Compose([
     transforms.Grayscale(num_output_channels=1),  # ensure the image is grayscale
     transforms.Resize((28, 28)),                    # resize to MNIST dimensions
@@ -55,16 +175,140 @@ transform = transforms.Compose([
     transforms.Normalize((0.1307,), (0.3081,))
 ])
 
+# Normalization constants of the training transform
+MNIST_MEAN, MNIST_STD = 0.1307, 0.3081
+# ToTensor + Normalize folded into one multiply-subtract:
+# (x / 255 - mean) / std == x * NORM_SCALE - NORM_SHIFT
+NORM_SCALE = 1.0 / (255.0 * MNIST_STD)
+NORM_SHIFT = MNIST_MEAN / MNIST_STD
+IMAGE_SIZE = (28, 28)
+IMAGE_PIXELS = IMAGE_SIZE[0] * IMAGE_SIZE[1]
+# Largest number of images accepted by /predict_batch
+PREDICT_BATCH_MAX_IMAGES = int(os.environ.get("PREDICT_BATCH_MAX_IMAGES", 1024))
+
+# Per-thread uint8 pixel buffer, grown on demand and reused across requests
+_buffers = threading.local()
+
+def decode_data_url(image_data):
+    """Decodes a base64 data URL (e.g. "data:image/png;base64,....") into bytes."""
+    header, encoded = image_data.split(",", 1)
+    return base64.b64decode(encoded)
+
+def _pixel_buffer(count):
+    buffer = getattr(_buffers, "pixels", None)
+    if buffer is None or len(buffer) < count * IMAGE_PIXELS:
+        buffer = bytearray(max(count, 32) * IMAGE_PIXELS)
+        _buffers.pixels = buffer
+    return buffer
+
+def preprocess_batch(images_bytes):
+    """
+    Fast replacement for stacking transform(img) over a batch: every image is
+    decoded, converted to grayscale and resized by PIL straight into a
+    preallocated uint8 buffer, then the whole batch is converted and
+    normalized in a single pass.
+
+    Returns:
+        torch.Tensor: (N, 1, 28, 28) float tensor.
+    """
+    count = len(images_bytes)
+    buffer = _pixel_buffer(count)
+    view = memoryview(buffer)
+    for index, img_bytes in enumerate(images_bytes):
+        img = Image.open(io.BytesIO(img_bytes))
+        if img.mode != 'L':
+            img = img.convert('L')
+        # Same bilinear resize torchvision's Resize applies to PIL images
+        img = img.resize(IMAGE_SIZE, Image.BILINEAR)
+        view[index * IMAGE_PIXELS:(index + 1) * IMAGE_PIXELS] = img.tobytes()
+    pixels = torch.frombuffer(buffer, dtype=torch.uint8, count=count * IMAGE_PIXELS)
+    # .to() copies out of the shared buffer before it is reused
+    return pixels.view(count, 1, *IMAGE_SIZE).to(torch.float32).mul_(NORM_SCALE).sub_(NORM_SHIFT)
+
+# Micro-batching settings (set per instance by the platform)
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 32))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", 5))
+
+class MicroBatcher:
+    """
+    Collects concurrent single-image requests into one batched forward pass.
+    A request waits at most max_wait_ms for others to join its batch.
+
+    The worker thread is started lazily per process: threads do not survive
+    fork, so workers of a preforking server each start their own.
+    """
+    def __init__(self, model, max_batch_size, max_wait_ms):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.lock = threading.Lock()
+        self.pid = None
+        self.requests = None
+        self.worker = None
+
+    def _ensure_worker(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self.requests = queue.Queue()
+                self.worker = threading.Thread(target=self._run, args=(self.requests,), daemon=True)
+                self.worker.start()
+                self.pid = os.getpid()
+
+    def submit(self, img):
+        """Queues a preprocessed (1, 28, 28) tensor; returns a Future of the predicted class."""
+        self._ensure_worker()
+        future = Future()
+        self.requests.put((img, future))
+        return future
+
+    def _collect(self, requests):
+        batch = [requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, requests):
+        while True:
+            batch = self._collect(requests)
+            try:
+                images = torch.stack([img for img, _ in batch]).to(device)
+                with torch.inference_mode():
+                    _, predicted = torch.max(self.model(images), 1)
+                for (_, future), label in zip(batch, predicted.tolist()):
+                    future.set_result(int(label))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+batcher = MicroBatcher(model, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if model is not None and BATCH_MAX_SIZE > 1 else None
+
 @app.route('/')
 def index():
     # Render an HTML page for uploading images.
     # Make sure an index.html exists in a folder named "templates" alongside this file.
     return render_template('index.html')
 
+@app.route('/health')
+def health():
+    # Readiness probe target: the model is loaded at import time, so answering
+    # at all means the instance can serve predictions.
+    if model is None:
+        return jsonify({'status': 'error', 'error': 'Model not loaded'}), 503
+    return jsonify({'status': 'ok'})
+
 @app.route('/predict', methods=['POST'])
 def predict():
     if model is None:
-        return jsonify({'error': 'Model not loaded.'}), 500
+        return jsonify({'error': 'Model not loaded.'}), 503
 
     # Check if the request is JSON (sent by the web app) or a file upload
     if request.is_json:
@@ -74,8 +318,7 @@ def predict():
             return jsonify({'error': 'No image_data provided in JSON payload'}), 400
         try:
             # image_data is a data URL (e.g., "data:image/png;base64,....")
-            header, encoded = image_data.split(",", 1)
-            img_bytes = base64.b64decode(encoded)
+            img_bytes = decode_data_url(image_data)
         except Exception as e:
             return jsonify({'error': f'Error decoding base64 image data: {e}'}), 400
     else:
@@ -87,21 +330,62 @@ def predict():
         img_bytes = file.read()
 
     try:
-        # Open the image from bytes and convert it to grayscale
-        img = Image.open(io.BytesIO(img_bytes)).convert('L')
-        # Preprocess the image
-        img = transform(img)
-        img = img.unsqueeze(0)  # add a batch dimension
+        # Decode, grayscale, resize and normalize the image
+        img = preprocess_batch([img_bytes])[0]
     except Exception as e:
-        return jsonify({'error': f'Error processing image: {e}'}), 500
+        return jsonify({'error': f'Error processing image: {e}'}), 400
 
     try:
-        # Run the model inference
-        with torch.no_grad():
-            outputs = model(img.to(device))
-            _, predicted = torch.max(outputs.data, 1)
+        # Run the model inference, batched with concurrent requests if enabled
+        if batcher is not None:
+            prediction = batcher.submit(img).result()
+        else:
+            with torch.inference_mode():
+                outputs = model(img.unsqueeze(0).to(device))  # add a batch dimension
+                _, predicted = torch.max(outputs.data, 1)
+            prediction = int(predicted.item())
         # Return the prediction as JSON
-        return jsonify({'prediction': int(predicted.item())})
+        return jsonify({'prediction': prediction})
+    except Exception as e:
+        return jsonify({'error': f'Model prediction error: {e}'}), 500
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    if model is None:
+        return jsonify({'error': 'Model not loaded.'}), 503
+
+    # Accept a JSON array of data URLs or a multipart upload with several "images" files
+    images_bytes = []
+    if request.is_json:
+        data = request.get_json()
+        images = data.get("images") if isinstance(data, dict) else None
+        if not images or not isinstance(images, list):
+            return jsonify({'error': 'No images list provided in JSON payload'}), 400
+        for index, image_data in enumerate(images):
+            try:
+                images_bytes.append(decode_data_url(image_data))
+            except Exception as e:
+                return jsonify({'error': f'Error decoding base64 image data at index {index}: {e}'}), 400
+    else:
+        files = request.files.getlist('images') or request.files.getlist('image')
+        if not files:
+            return jsonify({'error': 'No files provided in the "images" field'}), 400
+        images_bytes = [file.read() for file in files]
+
+    if len(images_bytes) > PREDICT_BATCH_MAX_IMAGES:
+        return jsonify({'error': f'Too many images: {len(images_bytes)} > {PREDICT_BATCH_MAX_IMAGES}'}), 413
+
+    try:
+        batch = preprocess_batch(images_bytes)
+    except Exception as e:
+        return jsonify({'error': f'Error processing images: {e}'}), 400
+
+    try:
+        # One forward pass for the whole batch
+        with torch.inference_mode():
+            outputs = model(batch.to(device))
+            _, predicted = torch.max(outputs, 1)
+        return jsonify({'predictions': [int(label) for label in predicted.tolist()]})
     except Exception as e:
         return jsonify({'error': f'Model prediction error: {e}'}), 500
 
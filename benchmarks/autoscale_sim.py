@@ -0,0 +1,142 @@
+"""
+Synthetic load against the autoscaler.
+
+Replays an open-loop request schedule (phases of duration:rps) through the
+Flask proxy or the async gateway to stub inference backends, and prints the
+replica count and the traffic the autoscaler sees once per evaluation.
+Deployments are simulated: a scale-up starts another stub backend after
+--boot-seconds instead of launching a real instance.
+
+Usage:
+    python benchmarks/autoscale_sim.py --phases 20:5 40:80 40:5 \
+        --backend-delay 0.2 --min 1 --max 8 --target-in-flight 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+from gateway_loadtest import StubProcess, free_port, start_flask, start_gateway, start_stub_backend  # noqa: E402
+
+MODEL_NAME = "autoscale_stub"
+
+
+def install_stub_deployments(backend_delay, boot_seconds):
+    """Replaces instance deployment with stub backends that boot in boot_seconds."""
+    def deploy_stub(model_name, zip_path, descriptor, app_type, locked=False):
+        instance = {
+            "id": str(uuid.uuid4()),
+            "port": 0,
+            "process": StubProcess(),
+            "status": "initializing",
+            "url": "",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "deploying": True,
+            "model_name": model_name,
+        }
+        server.app_servers[model_name]["inference_apps"].append(instance)
+        time.sleep(boot_seconds)
+        instance["port"] = start_stub_backend(backend_delay)
+        instance["url"] = f"http://localhost:{instance['port']}"
+        instance["status"] = "running"
+        instance["deploying"] = False
+        return instance
+
+    server.deploy_instance = deploy_stub
+    server.prepare_deployment = lambda *args: None
+
+
+async def run_schedule(port, phases, results):
+    url = f"http://127.0.0.1:{port}/model/{MODEL_NAME}/predict"
+    payload = {"image_data": "data:image/png;base64," + "A" * 1024}
+    limits = httpx.Limits(max_connections=2000, max_keepalive_connections=500)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one():
+            started = time.perf_counter()
+            try:
+                resp = await client.post(url, json=payload)
+                ok = resp.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            results.append((time.time(), time.perf_counter() - started, ok))
+
+        tasks = []
+        for duration, rps in phases:
+            end = time.perf_counter() + duration
+            while time.perf_counter() < end:
+                tasks.append(asyncio.create_task(one()))
+                await asyncio.sleep(1.0 / rps)
+        await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["flask", "gateway"], default="gateway")
+    parser.add_argument("--phases", nargs="+", default=["20:5", "40:80", "40:5"], help="duration_s:rps")
+    parser.add_argument("--backend-delay", type=float, default=0.2)
+    parser.add_argument("--boot-seconds", type=float, default=2.0)
+    parser.add_argument("--min", type=int, default=1)
+    parser.add_argument("--max", type=int, default=8)
+    parser.add_argument("--target-in-flight", type=float, default=4)
+    parser.add_argument("--target-p95-ms", type=float)
+    parser.add_argument("--up-cooldown", type=float, default=3)
+    parser.add_argument("--down-cooldown", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--window", type=float, default=10.0)
+    args = parser.parse_args()
+
+    phases = [tuple(float(x) for x in phase.split(":")) for phase in args.phases]
+    server.AUTOSCALE_WINDOW = args.window
+    descriptor = {"autoscale": {
+        "min_instances": args.min,
+        "max_instances": args.max,
+        "target_in_flight": args.target_in_flight,
+        "target_p95_ms": args.target_p95_ms,
+        "scale_up_cooldown": args.up_cooldown,
+        "scale_down_cooldown": args.down_cooldown,
+    }}
+
+    server.app_servers[MODEL_NAME] = {"web_apps": [], "inference_apps": [], "model_info": {"descriptor": descriptor, "zip_path": None}}
+    install_stub_deployments(args.backend_delay, args.boot_seconds)
+    server.scale_instances(MODEL_NAME, None, descriptor, "inference_app", args.min)
+
+    done = threading.Event()
+
+    def evaluate():
+        started = time.time()
+        while not done.is_set():
+            server.autoscale_model(MODEL_NAME, descriptor, None)
+            snapshot = server.traffic_snapshot(MODEL_NAME)
+            replicas = len(server.live_instances(MODEL_NAME, "inference_app"))
+            print(f"t={time.time() - started:6.1f}s replicas={replicas:2d} rps={snapshot['rps']:7.1f} "
+                  f"in_flight={snapshot['in_flight']:4d} p95_ms={snapshot['p95_ms']}")
+            done.wait(args.interval)
+
+    port = free_port()
+    stop = start_flask(port) if args.mode == "flask" else start_gateway(port)
+    threading.Thread(target=evaluate, daemon=True).start()
+    results = []
+    try:
+        asyncio.run(run_schedule(port, phases, results))
+    finally:
+        done.set()
+        stop()
+
+    latencies = sorted(latency for _, latency, _ in results)
+    errors = sum(1 for _, _, ok in results if not ok)
+    print(f"requests={len(results)} errors={errors} "
+          f"p50_ms={latencies[len(latencies) // 2] * 1000:.1f} "
+          f"p95_ms={latencies[int(0.95 * len(latencies))] * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Load test comparing the Flask proxy path (server.py) with the async gateway
+(gateway.py) on slow predictions.
+
+The stub inference backends, the front end under test and the load
+generator each run in their own process. The stubs answer every request
+after a fixed delay; the front-end process registers them directly in
+server.app_servers, so no model needs to be deployed.
+
+Usage:
+    python benchmarks/gateway_loadtest.py --mode both --concurrency 500 \
+        --requests 5000 --backend-delay 0.5 --backends 2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+
+MODEL_NAME = "loadtest_stub"
+CLIENT_CONNECTIONS = 8
+
+
+class StubProcess:
+    """Stands in for a Popen handle of a live instance."""
+    pid = 0
+
+    def poll(self):
+        return None
+
+    def terminate(self):
+        pass
+
+
+def serve_stub_backend(port, delay):
+    """Serves a threaded HTTP server that replies after `delay` seconds."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            time.sleep(delay)
+            body = b'{"prediction": 7}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = _reply
+        do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    class StubServer(ThreadingHTTPServer):
+        daemon_threads = True
+        # listen() runs in the constructor, so the backlog has to be a class attribute
+        request_queue_size = 4096
+
+    StubServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def register_stub_instances(ports):
+    server.app_servers[MODEL_NAME] = {
+        "web_apps": [],
+        "inference_apps": [
+            {
+                "id": str(uuid.uuid4()),
+                "port": port,
+                "process": StubProcess(),
+                "status": "running",
+                "url": f"http://localhost:{port}",
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "deploying": False,
+                "model_name": MODEL_NAME,
+            }
+            for port in ports
+        ],
+        "model_info": {"descriptor": {}, "zip_path": None},
+    }
+
+
+def serve_flask(port):
+    import logging
+
+    from werkzeug.serving import make_server
+
+    # Quiet per-request logging, like uvicorn's log_level="warning" below
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    make_server("127.0.0.1", port, server.app, threaded=True).serve_forever()
+
+
+def serve_gateway(port):
+    import uvicorn
+
+    import gateway
+
+    uvicorn.run(gateway.app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+def spawn(*args):
+    """Runs this script in another role as a child process."""
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), *args])
+
+
+def wait_for_port(port, timeout=30):
+    import socket
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+async def run_load(port, total, concurrency):
+    url = f"http://127.0.0.1:{port}/model/{MODEL_NAME}/predict"
+    payload = {"image_data": "data:image/png;base64," + "A" * 4096}
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    # One client per CLIENT_CONNECTIONS workers: a single httpx pool with
+    # hundreds of concurrent requests becomes the bottleneck itself
+    clients = [
+        httpx.AsyncClient(limits=httpx.Limits(max_connections=CLIENT_CONNECTIONS), timeout=120)
+        for _ in range(-(-concurrency // CLIENT_CONNECTIONS))
+    ]
+
+    async def worker(client):
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                resp = await client.post(url, json=payload)
+                if resp.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(clients[i % len(clients)]) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    finally:
+        for client in clients:
+            await client.aclose()
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(pct(0.50), 1),
+        "p95_ms": round(pct(0.95), 1),
+        "p99_ms": round(pct(0.99), 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+    }
+
+
+def free_port():
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["flask", "gateway", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--backend-delay", type=float, default=0.5, help="seconds per stub prediction")
+    parser.add_argument("--backends", type=int, default=2, help="number of stub inference instances")
+    # Internal: the roles of the child processes
+    parser.add_argument("--role", choices=["stub", "flask", "gateway"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--backend-ports", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role == "stub":
+        serve_stub_backend(args.port, args.backend_delay)
+        return
+    if args.role in ("flask", "gateway"):
+        register_stub_instances([int(p) for p in args.backend_ports.split(",")])
+        (serve_flask if args.role == "flask" else serve_gateway)(args.port)
+        return
+
+    backend_ports = [free_port() for _ in range(args.backends)]
+    children = [spawn("--role", "stub", "--port", str(p), "--backend-delay", str(args.backend_delay))
+                for p in backend_ports]
+    try:
+        for port in backend_ports:
+            wait_for_port(port)
+        modes = ["flask", "gateway"] if args.mode == "both" else [args.mode]
+        for mode in modes:
+            port = free_port()
+            front = spawn("--role", mode, "--port", str(port),
+                          "--backend-ports", ",".join(map(str, backend_ports)))
+            try:
+                wait_for_port(port)
+                result = asyncio.run(run_load(port, args.requests, args.concurrency))
+            finally:
+                front.terminate()
+                front.wait()
+            print(f"{mode:8s} " + " ".join(f"{k}={v}" for k, v in result.items()))
+    finally:
+        for child in children:
+            child.terminate()
+            child.wait()
+
+
+if __name__ == "__main__":
+    main()
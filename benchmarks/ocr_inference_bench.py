@@ -0,0 +1,76 @@
+"""
+Forward-pass latency of the OCR model in eager/no_grad mode versus the
+frozen TorchScript graph under inference_mode, across batch sizes and
+intra-op thread counts.
+
+Run it once per thread count you want to compare (torch's interop pool can
+only be configured once per process), e.g. to model 4 instances on an
+8-core host:
+    python benchmarks/ocr_inference_bench.py --threads 2
+    python benchmarks/ocr_inference_bench.py --threads 8
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ocr_preprocess_bench import INFERENCE_APP_DIR, load_inference_app  # noqa: E402
+
+
+def build_models(inference_app):
+    eager = inference_app.MNIST_CNN()
+    eager.load_state_dict(torch.load(os.path.join(INFERENCE_APP_DIR, "mnist_cnn.pt"), map_location="cpu"))
+    eager.eval()
+    scripted = inference_app.optimize_model(eager, "torchscript", torch.device("cpu"))
+    return eager, scripted
+
+
+def measure(fn, batch, iterations):
+    for _ in range(10):
+        fn(batch)
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(batch)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.median(samples) * 1e3, samples[int(0.95 * len(samples))] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    torch.set_num_interop_threads(1)
+    eager, scripted = build_models(load_inference_app())
+
+    def run_eager(batch):
+        with torch.no_grad():
+            return eager(batch)
+
+    def run_scripted(batch):
+        with torch.inference_mode():
+            return scripted(batch)
+
+    check = torch.randn(8, 1, 28, 28)
+    diff = (run_eager(check) - run_scripted(check)).abs().max().item()
+    print(f"threads={args.threads} max |eager - torchscript| = {diff:.2e}")
+    print(f"{'batch':>6} {'eager p50/p95 ms':>18} {'torchscript p50/p95 ms':>24} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        batch = torch.randn(batch_size, 1, 28, 28)
+        eager_p50, eager_p95 = measure(run_eager, batch, args.iterations)
+        ts_p50, ts_p95 = measure(run_scripted, batch, args.iterations)
+        print(f"{batch_size:>6} {eager_p50:>8.3f}/{eager_p95:<9.3f} {ts_p50:>12.3f}/{ts_p95:<11.3f} {eager_p50 / ts_p50:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Per-image preprocessing cost of the OCR inference app: the torchvision
+`transform` Compose versus the vectorized `preprocess_batch` path.
+
+Inputs are synthetic 280x280 RGBA PNG canvases like the ones the web app
+posts. The script also reports the largest difference between the two
+outputs to confirm they are numerically equivalent.
+
+Usage:
+    python benchmarks/ocr_preprocess_bench.py --images 512 --batch-sizes 1 8 32 128
+"""
+import argparse
+import importlib.util
+import io
+import os
+import random
+import time
+
+import torch
+from PIL import Image, ImageDraw
+
+INFERENCE_APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "models", "ocr_app", "src", "inference_app",
+)
+
+
+def load_inference_app():
+    """Imports the inference app module from its source folder."""
+    cwd = os.getcwd()
+    os.chdir(INFERENCE_APP_DIR)  # the app loads mnist_cnn.pt relative to cwd
+    try:
+        spec = importlib.util.spec_from_file_location("ocr_inference_app", os.path.join(INFERENCE_APP_DIR, "app.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        os.chdir(cwd)
+
+
+def make_canvas_png(rng):
+    img = Image.new("RGBA", (280, 280), (0, 0, 0, 255))
+    draw = ImageDraw.Draw(img)
+    points = [(rng.randint(40, 240), rng.randint(40, 240)) for _ in range(6)]
+    draw.line(points, fill=(255, 255, 255, 255), width=15)
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def reference(inference_app, images_bytes):
+    return torch.stack([
+        inference_app.transform(Image.open(io.BytesIO(b)).convert("L")) for b in images_bytes
+    ])
+
+
+def time_per_image(fn, images_bytes, batch_size, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for start in range(0, len(images_bytes), batch_size):
+            fn(images_bytes[start:start + batch_size])
+        best = min(best, time.perf_counter() - started)
+    return best / len(images_bytes) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    inference_app = load_inference_app()
+    rng = random.Random(0)
+    images_bytes = [make_canvas_png(rng) for _ in range(args.images)]
+
+    diff = (reference(inference_app, images_bytes[:64]) - inference_app.preprocess_batch(images_bytes[:64])).abs().max()
+    print(f"max |transform - preprocess_batch| = {diff.item():.2e}")
+
+    print(f"{'batch':>6} {'transform us/img':>18} {'preprocess_batch us/img':>24} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        ref_us = time_per_image(lambda b: reference(inference_app, b), images_bytes, batch_size, args.repeats)
+        fast_us = time_per_image(inference_app.preprocess_batch, images_bytes, batch_size, args.repeats)
+        print(f"{batch_size:>6} {ref_us:>18.1f} {fast_us:>24.1f} {ref_us / fast_us:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Accuracy-vs-latency report for the OCR model's int8 serving modes.
+
+Evaluates fp32, dynamic int8 (Linear layers) and static int8 (conv stack
+and Linear layers) on a held-out slice of the MNIST test set, reporting
+accuracy, agreement with fp32, forward latency and serialized model size.
+Static quantization is calibrated on a slice of the MNIST training set;
+--write-calibration also stores that slice as calibration.pt next to the
+inference app so instances deployed with QUANTIZATION=static can use it.
+
+Without access to the MNIST download, --source mlxtend uses the 5000-image
+MNIST subset bundled with mlxtend instead, split into disjoint calibration
+and evaluation images.
+
+Usage:
+    python benchmarks/ocr_quantization_report.py --data-dir ~/.cache/mnist --download \
+        --samples 2000 --calibration 512 --output quantization_report.json
+    python benchmarks/ocr_quantization_report.py --source mlxtend --samples 2000 --calibration 512
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import torch
+from torchvision import datasets
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ocr_preprocess_bench import INFERENCE_APP_DIR, load_inference_app  # noqa: E402
+
+
+def normalize(inference_app, images):
+    """Preprocesses uint8 (N, 28, 28) images exactly like served requests."""
+    return images.unsqueeze(1).to(torch.float32).mul_(inference_app.NORM_SCALE).sub_(inference_app.NORM_SHIFT)
+
+
+def load_split(inference_app, data_dir, train, count, download):
+    """Returns (images, labels) of the torchvision MNIST train or test split."""
+    dataset = datasets.MNIST(data_dir, train=train, download=download)
+    return normalize(inference_app, dataset.data[:count]), dataset.targets[:count]
+
+
+def load_mlxtend_splits(inference_app, samples, calibration):
+    """
+    Returns (test_images, test_labels, calibration_images) from mlxtend's
+    MNIST subset, shuffled with a fixed seed so both parts cover every digit.
+    """
+    from mlxtend.data import mnist_data
+
+    pixels, labels = mnist_data()
+    if samples + calibration > len(labels):
+        raise ValueError(f"mlxtend's subset has {len(labels)} images, asked for {samples + calibration}")
+    order = torch.randperm(len(labels), generator=torch.Generator().manual_seed(0))
+    images = normalize(inference_app, torch.from_numpy(pixels).to(torch.uint8).view(-1, 28, 28)[order])
+    labels = torch.from_numpy(labels)[order]
+    return images[:samples], labels[:samples], images[samples:samples + calibration]
+
+
+def serialized_size(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def latency_ms(model, batch, iterations):
+    with torch.inference_mode():
+        for _ in range(10):
+            model(batch)
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            model(batch)
+            samples.append(time.perf_counter() - started)
+    samples.sort()
+    return round(statistics.median(samples) * 1e3, 3), round(samples[int(0.95 * len(samples))] * 1e3, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=["torchvision", "mlxtend"], default="torchvision")
+    parser.add_argument("--data-dir", help="torchvision MNIST root (required with --source torchvision)")
+    parser.add_argument("--download", action="store_true")
+    parser.add_argument("--samples", type=int, default=2000, help="held-out test images")
+    parser.add_argument("--calibration", type=int, default=512, help="training images for static calibration")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--write-calibration", action="store_true")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+    if args.source == "torchvision" and not args.data_dir:
+        parser.error("--data-dir is required with --source torchvision")
+
+    torch.set_num_threads(args.threads)
+    inference_app = load_inference_app()
+
+    fp32 = inference_app.MNIST_CNN()
+    fp32.load_state_dict(torch.load(os.path.join(INFERENCE_APP_DIR, "mnist_cnn.pt"), map_location="cpu"))
+    fp32.eval()
+
+    if args.source == "mlxtend":
+        test_images, test_labels, calibration = load_mlxtend_splits(inference_app, args.samples, args.calibration)
+    else:
+        test_images, test_labels = load_split(inference_app, args.data_dir, False, args.samples, args.download)
+        calibration, _ = load_split(inference_app, args.data_dir, True, args.calibration, args.download)
+    if args.write_calibration:
+        path = os.path.join(INFERENCE_APP_DIR, "calibration.pt")
+        torch.save(calibration.clone(), path)
+        print(f"Wrote {len(calibration)} calibration images to {path}")
+
+    variants = {
+        "fp32": fp32,
+        "dynamic": inference_app.quantize_model(fp32, "dynamic"),
+        "static": inference_app.quantize_model(fp32, "static", calibration),
+    }
+
+    with torch.inference_mode():
+        reference = fp32(test_images).argmax(1)
+
+    report = {"source": args.source, "samples": len(test_labels), "threads": args.threads, "variants": {}}
+    for name, model in variants.items():
+        with torch.inference_mode():
+            predicted = model(test_images).argmax(1)
+        p50_1, p95_1 = latency_ms(model, test_images[:1], args.iterations)
+        p50_32, p95_32 = latency_ms(model, test_images[:32], args.iterations)
+        report["variants"][name] = {
+            "accuracy": round((predicted == test_labels).float().mean().item(), 4),
+            "agreement_with_fp32": round((predicted == reference).float().mean().item(), 4),
+            "latency_ms_batch1": {"p50": p50_1, "p95": p95_1},
+            "latency_ms_batch32": {"p50": p50_32, "p95": p95_32},
+            "model_bytes": serialized_size(model),
+        }
+
+    print(f"{'variant':>8} {'accuracy':>9} {'agree':>7} {'b1 p50 ms':>10} {'b32 p50 ms':>11} {'size KB':>8}")
+    for name, row in report["variants"].items():
+        print(f"{name:>8} {row['accuracy']:>9.4f} {row['agreement_with_fp32']:>7.4f} "
+              f"{row['latency_ms_batch1']['p50']:>10.3f} {row['latency_ms_batch32']['p50']:>11.3f} "
+              f"{row['model_bytes'] / 1024:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Async (ASGI) gateway mode for the platform server.
+
+Serves the same routes as server.py from one process, but handles the
+high-volume paths with non-blocking upstream I/O:
+
+  - /model/<model_name>/status        answered directly from app_servers
+  - /model/<model_name>/<path:subpath> streamed to an inference instance
+
+Every other route (upload, pages, instance management, ...) is passed to the
+existing Flask app through a WSGI adapter that runs it on a thread pool, so
+both modes share the same app_servers registry, deployment locks and warm pool.
+
+Run with:
+    uvicorn gateway:app --host 0.0.0.0 --port 5000
+or:
+    python gateway.py
+"""
+import asyncio
+import json
+import os
+import re
+import time
+
+import httpx
+from a2wsgi import WSGIMiddleware
+
+import server
+
+# Upper bound on concurrent upstream requests per inference instance; requests
+# past it wait in the gateway instead of opening more connections.
+GATEWAY_INSTANCE_CONCURRENCY = int(os.environ.get("GATEWAY_INSTANCE_CONCURRENCY", 1024))
+# Connections per upstream httpx client. One httpx pool slows down sharply with
+# hundreds of requests in it, so an instance's connections are spread over as
+# many small clients as its load needs.
+GATEWAY_CLIENT_CONNECTIONS = int(os.environ.get("GATEWAY_CLIENT_CONNECTIONS", 8))
+# Threads running the Flask routes (uploads, pages, log follows, ...), so a
+# long upload or an open log stream does not hold up the other routes.
+GATEWAY_FLASK_WORKERS = int(os.environ.get("GATEWAY_FLASK_WORKERS", 64))
+
+# Routes under /model/<model_name>/ that Flask serves itself, with the methods
+# they accept. Any other subpath (or method) falls through to the proxy, which
+# mirrors how Flask resolves them against the catch-all proxy rule.
+FLASK_MODEL_ROUTES = {
+    "api_doc": {"GET", "HEAD"},
+    "instances": {"GET", "HEAD"},
+    "create_instance": {"POST"},
+    "scale": {"POST"},
+    "stop_instance": {"POST"},
+}
+# Same for routes taking further path segments, e.g. logs/<instance_id>.
+FLASK_MODEL_PREFIXES = {
+    "logs/": {"GET", "HEAD"},
+}
+PROXY_METHODS = {"GET", "POST", "PUT", "DELETE", "PATCH"}
+MODEL_PATH = re.compile(r"/model/([^/]+)/(.+)")
+
+flask_app = WSGIMiddleware(server.app, workers=GATEWAY_FLASK_WORKERS)
+# Built once: every client loading the CA bundle itself stalls the event loop
+upstream_ssl_context = httpx.create_ssl_context()
+upstreams = {}  # instance id -> {"clients": [[httpx.AsyncClient, in_flight], ...], "slots": asyncio.Semaphore}
+
+
+async def close_upstream(upstream):
+    for upstream_client, _ in upstream["clients"]:
+        await upstream_client.aclose()
+
+
+async def close_stale_upstreams():
+    """Closes the clients of instances that are gone or no longer running."""
+    current = {
+        instance["id"]
+        for model_data in list(server.app_servers.values())
+        for instance in model_data.get("inference_apps", [])
+        if instance["status"] in ("running", "draining")
+    }
+    for instance_id in [i for i in upstreams if i not in current]:
+        await close_upstream(upstreams.pop(instance_id))
+
+
+async def get_upstream(instance):
+    """
+    Returns the upstream of an instance: its clients and the semaphore
+    bounding its concurrent requests, creating them on first use.
+    """
+    upstream = upstreams.get(instance["id"])
+    if upstream is None:
+        await close_stale_upstreams()
+        upstream = upstreams.setdefault(
+            instance["id"], {"clients": [], "slots": asyncio.Semaphore(GATEWAY_INSTANCE_CONCURRENCY)}
+        )
+    return upstream
+
+
+def checkout_client(upstream):
+    """
+    Picks the least busy client of an upstream, adding a client when all of
+    them already use every connection. The caller decrements the returned
+    entry's in-flight count when done.
+    """
+    entry = min(upstream["clients"], key=lambda e: e[1], default=None)
+    if entry is None or entry[1] >= GATEWAY_CLIENT_CONNECTIONS:
+        entry = [
+            httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=GATEWAY_CLIENT_CONNECTIONS,
+                    max_keepalive_connections=GATEWAY_CLIENT_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(server.PROXY_READ_TIMEOUT, connect=server.PROXY_CONNECT_TIMEOUT),
+                verify=upstream_ssl_context,
+                trust_env=False,
+            ),
+            0,
+        ]
+        upstream["clients"].append(entry)
+    entry[1] += 1
+    return entry
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def request_body(receive):
+    """Yields the client's request body as it arrives."""
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        chunk = message.get("body", b"")
+        if chunk:
+            yield chunk
+        more_body = message.get("more_body", False)
+
+
+async def wait_for_routable_instance(model_name, timeout):
+    """Async counterpart of server.wait_for_routable_instance."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        instance = server.select_inference_instance(model_name)
+        if instance:
+            return instance
+        await asyncio.sleep(0.2)
+    return None
+
+
+async def resolve_instance(model_name):
+    """
+    Same selection policy as proxy_model_api: pick a routable instance, wait
+    for an in-progress deployment, or resume a suspended instance / deploy one
+    (in a worker thread) and wait for it to pass readiness.
+
+    Returns:
+        tuple: (instance, None) or (None, (status, error_payload)).
+    """
+    instance = server.select_inference_instance(model_name)
+
+    if not instance and server.is_inference_deploying(model_name):
+        server.warm_pool_wakeup.set()
+        instance = await wait_for_routable_instance(model_name, server.PROXY_DEPLOY_WAIT_SECONDS)
+
+    if not instance:
+        resumed = await asyncio.to_thread(server.resume_model, model_name)
+        if resumed is None:
+            try:
+                descriptor, zip_path = server.load_release(model_name)
+            except Exception as e:
+                return None, (500, {"error": str(e)})
+            if descriptor is None:
+                return None, (404, {"error": "Model not found or not properly packaged"})
+            try:
+                await asyncio.to_thread(
+                    server.deploy_instance, model_name, zip_path, descriptor, "inference_app"
+                )
+            except Exception as e:
+                return None, (500, {"error": str(e)})
+        instance = await wait_for_routable_instance(model_name, server.PROXY_DEPLOY_WAIT_SECONDS)
+        if not instance:
+            return None, (503, {"error": "No inference instance became ready"})
+
+    return instance, None
+
+
+async def proxy(scope, receive, send, model_name, subpath):
+    """Streams a request to an inference instance and the reply back."""
+    instance, error = await resolve_instance(model_name)
+    if error:
+        await send_json(send, *error)
+        return
+
+    url = f"http://localhost:{instance['port']}/{subpath}"
+    if scope.get("query_string"):
+        url += "?" + scope["query_string"].decode("latin-1")
+    headers = [
+        (name, value) for name, value in scope["headers"]
+        if name.decode("latin-1").lower() not in server.HOP_BY_HOP_HEADERS
+    ]
+
+    upstream = await get_upstream(instance)
+    # Requests waiting for a slot count as in flight for load balancing
+    started = server.acquire_instance(instance)
+    success = False
+    try:
+        async with upstream["slots"]:
+            entry = checkout_client(upstream)
+            try:
+                success = await forward(scope, receive, send, entry[0], url, headers)
+            finally:
+                entry[1] -= 1
+    finally:
+        server.release_instance(instance, started, success)
+
+
+async def forward(scope, receive, send, upstream_client, url, headers):
+    """
+    Sends one proxied request upstream and relays the reply.
+
+    Returns:
+        bool: False if the request failed because of the instance.
+    """
+    upstream_request = upstream_client.build_request(
+        scope["method"], url, headers=headers, content=request_body(receive)
+    )
+    try:
+        resp = await upstream_client.send(upstream_request, stream=True)
+    except httpx.TimeoutException as e:
+        await send_json(send, 504, {"error": f"Upstream timeout: {e}"})
+        return False
+    except httpx.HTTPError as e:
+        await send_json(send, 502, {"error": f"Upstream error: {e}"})
+        return False
+
+    try:
+        # Relayed undecoded, so Content-Encoding/Length stay valid
+        await send({
+            "type": "http.response.start",
+            "status": resp.status_code,
+            "headers": [
+                (name, value) for name, value in resp.headers.raw
+                if name.decode("latin-1").lower() not in server.HOP_BY_HOP_HEADERS
+            ],
+        })
+        async for chunk in resp.aiter_raw(server.PROXY_CHUNK_SIZE):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+        return resp.status_code not in server.INSTANCE_FAILURE_STATUSES
+    finally:
+        await resp.aclose()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            server.start_warm_pool()
+            server.start_autoscaler()
+            server.start_idle_reaper()
+            server.start_supervisor()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            for upstream in list(upstreams.values()):
+                await close_upstream(upstream)
+            upstreams.clear()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    if scope["type"] == "http":
+        match = MODEL_PATH.fullmatch(scope["path"])
+        method = scope["method"]
+        if match:
+            model_name, subpath = match.groups()
+            if subpath == "status" and method in ("GET", "HEAD"):
+                await send_json(send, 200, server.build_model_status(model_name))
+                return
+            if method in FLASK_MODEL_ROUTES.get(subpath, ()) or any(
+                subpath.startswith(prefix) and "/" not in subpath[len(prefix):] and method in methods
+                for prefix, methods in FLASK_MODEL_PREFIXES.items()
+            ):
+                await flask_app(scope, receive, send)
+                return
+            if method not in PROXY_METHODS:
+                await send_json(send, 405, {"error": f"Method {method} not allowed"})
+                return
+            await proxy(scope, receive, send, model_name, subpath)
+            return
+
+    await flask_app(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -1,5 +1,5 @@
 import random
-from flask import Flask, request, redirect, url_for, Response, render_template, flash, jsonify
+from flask import Flask, Request, request, redirect, url_for, Response, render_template, flash, jsonify
 import os
 import threading
 from werkzeug.utils import secure_filename
@@ -12,6 +12,8 @@ import json
 import datetime
 import tempfile
 import shutil
+import sys
+from contextlib import contextmanager
 
 
 app = Flask(__name__)
@@ -33,7 +35,8 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 #         "status": "running|stopped", 
 #         "url": str,
 #         "created_at": datetime string,
-#         "deploying": Boolean
+#         "deploying": Boolean,
+#         "venv_key": str  # shared venv cache entry
 #       }
 #     ],
 #     "inference_apps": [
@@ -44,12 +47,24 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 #         "status": "running|stopped", 
 #         "url": str,
 #         "created_at": datetime string,
-#         "deploying": Boolean
+#         "deploying": Boolean,
+#         "venv_key": str,  # shared venv cache entry
+#         "boot_seconds": float,  # process start to first successful readiness probe
+#         "workers": int,  # preforked worker processes (inference apps)
+#         "in_flight": int,  # proxied requests currently being served
+#         "ewma_latency": float,  # smoothed proxied request latency (s)
+#         "model_name": str,  # owning model, for per-model traffic stats
+#         "launch": dict,  # python, app_file, app_dir, workers, env, readiness_path to (re)start the process
+#         "last_request_at": float,  # epoch of the last proxied request (or start)
+#         "consecutive_errors": int,  # failed proxied requests in a row
+#         "health_failures": int,  # failed supervisor health checks in a row
+#         "ejected_until": float  # epoch until which the balancer skips the instance
 #       }
 #     ],
 #     "model_info": {
 #       "descriptor": dict,  # cached descriptor
-#       "zip_path": str      # path to zip file
+#       "zip_path": str,     # path to zip file
+#       "replicas": dict     # app type -> replica count requested via /scale
 #     }
 #   }
 # }
@@ -74,7 +89,678 @@ def log_message(log_file_path, message):
     with open(log_file_path, "a") as lf:
         lf.write(f"[{timestamp}] {message}\n")
 
-def deploy_instance(model_name, zip_path, descriptor, app_type):
+#############################################
+# Virtual Environment Cache                 #
+#############################################
+# Instances of the same model/app type share a prebuilt venv keyed by a hash
+# of their requirement set:
+# VENV_CACHE_DIR/
+#   <hash>/
+#     bin/, lib/, ...     # the venv itself (read-only once built)
+#     .cache_meta.json    # requirements, size, build time
+#     .complete           # written last; its mtime is the LRU timestamp
+
+VENV_CACHE_DIR = os.path.join(PROJECT_ROOT, "venv_cache")
+VENV_CACHE_MAX_BYTES = int(os.environ.get("VENV_CACHE_MAX_BYTES", 20 * 1024 ** 3))
+VENV_CACHE_MAX_ENTRIES = int(os.environ.get("VENV_CACHE_MAX_ENTRIES", 16))
+# Optional platform-wide wheel directory; when set, installs run with --no-index
+PIP_WHEELHOUSE = os.environ.get("PIP_WHEELHOUSE")
+# Interpreter the venvs are created from; part of the cache key
+VENV_PYTHON = sys.executable
+
+venv_cache_lock = threading.Lock()
+venv_build_locks = {}
+venv_cache_stats = {"hits": 0, "builds": 0, "build_failures": 0, "evictions": 0}
+
+def venv_bin(venv_dir, executable):
+    """
+    Returns the platform-specific path of an executable inside a venv.
+    """
+    if os.name == "nt":
+        return os.path.join(venv_dir, "Scripts", executable)
+    return os.path.join(venv_dir, "bin", executable)
+
+def read_requirements_file(req_file):
+    """
+    Reads the non-empty, non-comment lines of a requirements.txt file.
+    """
+    if not os.path.exists(req_file):
+        return []
+    with open(req_file, "r") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+def requirement_name(requirement):
+    """
+    Returns the normalized (PEP 503) project name of a requirement string,
+    e.g. "Torch==2.6.0" -> "torch", "typing_extensions>=4" -> "typing-extensions",
+    "torch~=2.6" -> "torch", "numpy!=1.0" -> "numpy".
+    """
+    return re.sub(r"[-_.]+", "-", requirement_project(requirement)).lower()
+
+def requirement_project(requirement):
+    """
+    Returns the project name of a requirement string as written, without
+    extras, version specifiers or markers.
+    """
+    return re.split(r"[\s\[;@=<>!~]", requirement.strip(), maxsplit=1)[0]
+
+def _is_bare_requirement(requirement):
+    return re.fullmatch(r"[A-Za-z0-9._-]+", requirement.strip()) is not None
+
+# pip options that reference files next to the requirements.txt; the shared
+# venv is installed from a resolved copy elsewhere, so they cannot be honoured
+PATH_REQUIREMENT_OPTIONS = ("-e", "--editable", "-r", "--requirement", "-c", "--constraint")
+
+def merge_requirements(*requirement_lists):
+    """
+    Merges requirement lists into one de-duplicated set keyed by project name.
+    A requirement carrying a version specifier or marker wins over a bare
+    name, so the descriptor's "torch" and requirements.txt's "torch==2.6.0"
+    collapse to the pinned entry; between two specified entries the one from
+    the later list wins. pip option lines (e.g. --extra-index-url) are kept,
+    de-duplicated, ahead of the requirements.
+
+    Returns:
+        list: Option lines followed by requirement strings sorted by project name.
+
+    Raises:
+        ValueError: For -e/-r/-c lines, which point at files the shared venv
+            build cannot see.
+    """
+    options = []
+    merged = {}
+    for requirements in requirement_lists:
+        for req in requirements:
+            req = req.strip()
+            if not req or req.startswith("#"):
+                continue
+            if req.startswith("-"):
+                option = re.split(r"[\s=]", req, maxsplit=1)[0]
+                if option in PATH_REQUIREMENT_OPTIONS:
+                    raise ValueError(f"Unsupported requirement line '{req}': {option} is not supported by the shared environment cache")
+                if req not in options:
+                    options.append(req)
+                continue
+            name = requirement_name(req)
+            current = merged.get(name)
+            if current is None or not _is_bare_requirement(req):
+                merged[name] = req
+    return options + [merged[name] for name in sorted(merged)]
+
+def resolve_app_requirements(descriptor, app_type, app_dir):
+    """
+    Builds the requirement set of an app from its descriptor entry and the
+    requirements.txt shipped in the app directory. Descriptor entries are
+    reduced to project names (older releases may hold mangled specifiers
+    such as "torch~"), so the requirements.txt line decides the version.
+
+    Args:
+        descriptor (dict): Model descriptor data.
+        app_type (str): 'web_app' or 'inference_app'.
+        app_dir (str): Directory containing the extracted app files.
+
+    Returns:
+        list: Merged requirement strings, one per project.
+    """
+    names = [requirement_project(req) for req in descriptor.get("requirements", {}).get(app_type) or []]
+    return merge_requirements(
+        [name for name in names if name and not name.startswith("-")],
+        read_requirements_file(os.path.join(app_dir, "requirements.txt"))
+    )
+
+def requirements_hash(requirements):
+    """
+    Computes the cache key of a requirement set. The interpreter (VENV_PYTHON)
+    and its version are part of the key since a venv is bound to the Python
+    that created it.
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    digest.update(f"python-{sys.version_info.major}.{sys.version_info.minor} {VENV_PYTHON}\n".encode())
+    for req in sorted(set(requirements)):
+        digest.update(req.encode() + b"\n")
+    return digest.hexdigest()[:16]
+
+def _directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+    return total
+
+def _set_tree_writable(path, writable):
+    """
+    Adds or removes the write bits on every file and directory under path.
+    """
+    import stat
+    write_bits = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            entry = os.path.join(root, name)
+            if os.path.islink(entry):
+                continue
+            mode = os.lstat(entry).st_mode
+            os.chmod(entry, (mode | stat.S_IWUSR) if writable else (mode & ~write_bits))
+    mode = os.lstat(path).st_mode
+    os.chmod(path, (mode | stat.S_IWUSR) if writable else (mode & ~write_bits))
+
+def _remove_read_only_tree(venv_dir):
+    # Unlinking only needs writable directories. File modes are left alone,
+    # since the files may be hardlinked into running instance directories.
+    if os.path.exists(venv_dir):
+        for root, dirs, files in os.walk(venv_dir):
+            os.chmod(root, os.lstat(root).st_mode | 0o700)
+        shutil.rmtree(venv_dir, ignore_errors=True)
+
+@contextmanager
+def timed_phase(log_file, phase):
+    """
+    Logs how long a deployment phase took.
+    """
+    started = time.time()
+    outcome = "failed"
+    try:
+        yield
+        outcome = "done"
+    finally:
+        log_message(log_file, f"[timing] {phase} {outcome} in {round(time.time() - started, 2)}s")
+
+def install_requirements(venv_dir, requirements, log_file, wheelhouse=None):
+    """
+    Installs a merged requirement set into a venv with a single pip
+    invocation, so the resolver and index scan run once for the whole set.
+
+    Args:
+        venv_dir (str): Target virtual environment.
+        requirements (list): Requirement strings (see merge_requirements).
+        log_file (str): Log file receiving progress and phase timings.
+        wheelhouse (str, optional): Directory of prebuilt wheels. When given,
+            pip installs offline from it with --no-index.
+    """
+    python = venv_bin(venv_dir, "python")
+    pip_cmd = [python, "-m", "pip", "--disable-pip-version-check"]
+
+    if not requirements:
+        log_message(log_file, "No requirements to install")
+        return
+
+    req_file = os.path.join(venv_dir, "requirements.resolved.txt")
+    with open(req_file, "w") as f:
+        f.write("\n".join(requirements) + "\n")
+
+    install_cmd = pip_cmd + ["install", "-r", req_file]
+    if wheelhouse:
+        install_cmd += ["--no-index", "--find-links", wheelhouse]
+    else:
+        # Only worth it when talking to an index; offline installs use the bundled pip
+        with timed_phase(log_file, "pip upgrade"):
+            subprocess.run(pip_cmd + ["install", "--upgrade", "pip"], check=True)
+
+    source = f"wheelhouse {wheelhouse}" if wheelhouse else "package index"
+    log_message(log_file, f"Installing {len(requirements)} packages from {source}: {', '.join(requirements)}")
+    with timed_phase(log_file, "pip install"):
+        result = subprocess.run(install_cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        log_message(log_file, f"pip install failed:\n{result.stdout[-4000:]}{result.stderr[-4000:]}")
+        raise RuntimeError(f"pip install failed with exit code {result.returncode}")
+    log_message(log_file, "Successfully installed all requirements")
+
+def venvs_in_use():
+    """
+    Returns the cache keys referenced by instances whose process is alive,
+    or that are suspended and will be resumed in place.
+    """
+    in_use = set()
+    for model in list(app_servers.values()):
+        for instance in model["web_apps"] + model["inference_apps"]:
+            proc = instance.get("process")
+            if instance.get("venv_key") and (instance.get("deploying") or instance["status"] == "suspended" or (proc and proc.poll() is None)):
+                in_use.add(instance["venv_key"])
+    return in_use
+
+def evict_venv_cache(keep=None):
+    """
+    Evicts least recently used venvs until the cache fits both
+    VENV_CACHE_MAX_BYTES and VENV_CACHE_MAX_ENTRIES. Venvs used by live
+    instances, being built, or named in keep are never evicted.
+
+    Returns:
+        list: Keys of the evicted venvs.
+    """
+    if not os.path.isdir(VENV_CACHE_DIR):
+        return []
+
+    protected = venvs_in_use() | set(keep or [])
+    entries = []
+    total_bytes = 0
+    for key in os.listdir(VENV_CACHE_DIR):
+        marker = os.path.join(VENV_CACHE_DIR, key, ".complete")
+        if not os.path.exists(marker):
+            continue
+        size = 0
+        try:
+            with open(os.path.join(VENV_CACHE_DIR, key, ".cache_meta.json"), "r") as f:
+                size = json.load(f).get("size_bytes", 0)
+        except Exception:
+            size = _directory_size(os.path.join(VENV_CACHE_DIR, key))
+        entries.append((os.path.getmtime(marker), key, size))
+        total_bytes += size
+
+    evicted = []
+    count = len(entries)
+    for _, key, size in sorted(entries):
+        if total_bytes <= VENV_CACHE_MAX_BYTES and count <= VENV_CACHE_MAX_ENTRIES:
+            break
+        if key in protected:
+            continue
+        with venv_cache_lock:
+            build_lock = venv_build_locks.setdefault(key, threading.Lock())
+        if not build_lock.acquire(blocking=False):
+            continue
+        try:
+            _remove_read_only_tree(os.path.join(VENV_CACHE_DIR, key))
+        finally:
+            build_lock.release()
+        total_bytes -= size
+        count -= 1
+        evicted.append(key)
+        venv_cache_stats["evictions"] += 1
+        print(f"Evicted cached venv {key} ({size} bytes)")
+    return evicted
+
+def get_or_build_venv(requirements, log_file, wheelhouse=None):
+    """
+    Returns a cached venv for the given requirement set, building it on a miss.
+    Concurrent deployments of the same requirement set wait for a single build.
+
+    Args:
+        requirements (list): Requirement strings to install.
+        log_file (str): Instance log file for build output.
+        wheelhouse (str, optional): Local wheel directory for offline installs.
+
+    Returns:
+        tuple: (venv_dir, cache_key, cache_hit)
+    """
+    key = requirements_hash(requirements)
+    venv_dir = os.path.join(VENV_CACHE_DIR, key)
+    marker = os.path.join(venv_dir, ".complete")
+    os.makedirs(VENV_CACHE_DIR, exist_ok=True)
+
+    with venv_cache_lock:
+        build_lock = venv_build_locks.setdefault(key, threading.Lock())
+
+    with build_lock:
+        if os.path.exists(marker):
+            os.utime(marker, None)
+            venv_cache_stats["hits"] += 1
+            log_message(log_file, f"Reusing cached environment {key}")
+            return venv_dir, key, True
+
+        # Anything without a marker is a leftover from an interrupted build
+        _remove_read_only_tree(venv_dir)
+        log_message(log_file, f"Building environment {key} ({len(requirements)} packages)")
+        started = time.time()
+        try:
+            with timed_phase(log_file, "venv create"):
+                subprocess.run([VENV_PYTHON, "-m", "venv", venv_dir], check=True)
+            install_requirements(venv_dir, requirements, log_file, wheelhouse=wheelhouse)
+        except Exception:
+            venv_cache_stats["build_failures"] += 1
+            _remove_read_only_tree(venv_dir)
+            raise
+
+        meta = {
+            "key": key,
+            "requirements": requirements,
+            "built_at": datetime.datetime.now().isoformat(),
+            "build_seconds": round(time.time() - started, 2),
+            "size_bytes": _directory_size(venv_dir)
+        }
+        with open(os.path.join(venv_dir, ".cache_meta.json"), "w") as f:
+            json.dump(meta, f, indent=4)
+        with open(marker, "w") as f:
+            f.write(meta["built_at"])
+        _set_tree_writable(venv_dir, False)
+        venv_cache_stats["builds"] += 1
+        log_message(log_file, f"Environment {key} built in {meta['build_seconds']}s")
+
+    evict_venv_cache(keep=[key])
+    return venv_dir, key, False
+
+#############################################
+# Shared Model Weights                      #
+#############################################
+# Weight files are published once per host into a content-addressed,
+# read-only store. Inference instances mmap them from there, so every
+# instance of a model maps the same page-cache pages instead of holding its
+# own copy of the weights:
+# SHARED_WEIGHTS_DIR/<sha256>.<ext>
+# Instances record the shared files they map; files no instance references
+# are removed once they have not been published for SHARED_WEIGHTS_GRACE_SECONDS.
+
+SHARED_WEIGHTS_DIR = os.path.join(PROJECT_ROOT, "shared_weights")
+SHARE_MODEL_WEIGHTS = os.environ.get("SHARE_MODEL_WEIGHTS", "1") == "1"
+SHARED_WEIGHTS_GRACE_SECONDS = float(os.environ.get("SHARED_WEIGHTS_GRACE_SECONDS", 600))
+
+shared_weights_lock = threading.Lock()
+weights_digest_cache = {}  # (absolute path, size, mtime_ns) -> sha256
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """
+    Returns the hex SHA-256 of a file, read in chunks.
+    """
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def publish_shared_weights(weights_path):
+    """
+    Stores a weights file in the shared store (once per content) and returns
+    the path of the shared, read-only copy.
+    """
+    stat = os.stat(weights_path)
+    cache_key = (os.path.abspath(weights_path), stat.st_size, stat.st_mtime_ns)
+    digest = weights_digest_cache.get(cache_key)
+    if digest is None:
+        digest = file_sha256(weights_path)
+        weights_digest_cache[cache_key] = digest
+
+    target = os.path.join(SHARED_WEIGHTS_DIR, digest + os.path.splitext(weights_path)[1])
+    with shared_weights_lock:
+        if not os.path.exists(target):
+            os.makedirs(SHARED_WEIGHTS_DIR, exist_ok=True)
+            staging = f"{target}.{os.getpid()}.tmp"
+            shutil.copyfile(weights_path, staging)
+            os.chmod(staging, 0o444)
+            os.replace(staging, target)
+        else:
+            # Marks the file as recently published for evict_shared_weights
+            os.utime(target)
+    return target
+
+def shared_weights_in_use():
+    """
+    Returns the shared weight files referenced by instances whose process is
+    alive, that are being deployed, or that are suspended.
+    """
+    in_use = set()
+    for model in list(app_servers.values()):
+        for instance in model["inference_apps"]:
+            proc = instance.get("process")
+            if instance.get("deploying") or instance["status"] == "suspended" or (proc and proc.poll() is None):
+                in_use.update(instance.get("shared_weights", []))
+    return in_use
+
+def evict_shared_weights():
+    """
+    Removes shared weight files that no instance references and that were
+    last published more than SHARED_WEIGHTS_GRACE_SECONDS ago.
+
+    Returns:
+        list: Paths of the removed files.
+    """
+    if not os.path.isdir(SHARED_WEIGHTS_DIR):
+        return []
+    evicted = []
+    with shared_weights_lock:
+        in_use = shared_weights_in_use()
+        cutoff = time.time() - SHARED_WEIGHTS_GRACE_SECONDS
+        for name in os.listdir(SHARED_WEIGHTS_DIR):
+            path = os.path.join(SHARED_WEIGHTS_DIR, name)
+            try:
+                if path in in_use or os.path.getmtime(path) > cutoff:
+                    continue
+                os.remove(path)
+            except OSError:
+                continue
+            evicted.append(path)
+            print(f"Evicted shared weights {path}")
+    return evicted
+
+def share_instance_weights(app_dir, descriptor, log_file):
+    """
+    Publishes an instance's weight files to the shared store.
+
+    Returns:
+        dict: Weight path relative to the app -> shared path (may be empty).
+    """
+    shared = {}
+    for rel_path in descriptor.get("files", {}).get("model_weights", []):
+        weights_path = os.path.join(app_dir, rel_path)
+        if not os.path.exists(weights_path):
+            continue
+        try:
+            shared[rel_path] = publish_shared_weights(weights_path)
+            log_message(log_file, f"Using shared weights {shared[rel_path]} for {rel_path}")
+        except Exception as e:
+            log_message(log_file, f"Could not share weights {rel_path}, instance keeps its own copy: {e}")
+    return shared
+
+#############################################
+# Release Cache                             #
+#############################################
+# Each release archive is extracted once into an immutable directory; new
+# instance directories are then built from it with reflinks (copy-on-write
+# clones, falling back to plain copies) instead of a fresh extraction + copy:
+# RELEASE_CACHE_DIR/<model_name>/<release key>/{web_app,inference_app}/...
+# The release key changes whenever the archive is replaced; each app subtree
+# is extracted on its own the first time an instance of that app is deployed.
+#
+# INSTANCE_MATERIALIZE=hardlink is opt-in and only safe for apps that never
+# write to their own files: every instance then shares the cache's inodes,
+# which are read-only, but a process running as root can still modify them
+# and would change the files of every instance of the release.
+
+RELEASE_CACHE_DIR = os.path.join(PROJECT_ROOT, "release_cache")
+# "hardlink", "reflink" or "copy": the first method tried per file
+INSTANCE_MATERIALIZE = os.environ.get("INSTANCE_MATERIALIZE", "reflink")
+ARCHIVE_CHUNK_SIZE = int(os.environ.get("ARCHIVE_CHUNK_SIZE", 1024 * 1024))
+
+release_cache_lock = threading.Lock()
+release_extract_locks = {}
+
+def release_key(zip_path):
+    """
+    Identifies a release archive version by its size and modification time.
+    """
+    import hashlib
+    stat = os.stat(zip_path)
+    return hashlib.sha1(f"{os.path.abspath(zip_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+
+def extract_archive(zip_path, dest_dir, prefix="", skip=()):
+    """
+    Extracts the members of a ZIP archive under prefix into dest_dir,
+    streaming each member to disk in ARCHIVE_CHUNK_SIZE chunks.
+
+    Args:
+        zip_path (str): Archive to read.
+        dest_dir (str): Directory receiving the members, relative to prefix.
+        prefix (str, optional): Only members below this folder are extracted.
+        skip (iterable, optional): Member paths (relative to prefix) to leave out.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    prefix = prefix.strip("/") + "/" if prefix else ""
+    skip = set(skip)
+    dest_root = os.path.realpath(dest_dir)
+    written = 0
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        for member in zip_ref.infolist():
+            name = member.filename.replace("\\", "/")
+            if not name.startswith(prefix) or name == prefix:
+                continue
+            rel_name = name[len(prefix):]
+            if rel_name.rstrip("/") in skip:
+                continue
+            target = os.path.realpath(os.path.join(dest_root, rel_name))
+            if os.path.commonpath([dest_root, target]) != dest_root:
+                raise ValueError(f"Unsafe path in archive {zip_path}: {member.filename}")
+            if member.is_dir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zip_ref.open(member) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, ARCHIVE_CHUNK_SIZE)
+            written += member.file_size
+    return written
+
+def get_extracted_release(model_name, zip_path, app_type):
+    """
+    Returns the read-only extracted copy of one app of a release archive,
+    extracting only that app's members on first use. The uploaded app
+    archive re-embedded in the release (e.g. inference_app/inference_app.zip)
+    is skipped. Older extractions of the same model are removed; instance
+    directories never depend on them (they hold links or copies of files).
+
+    Args:
+        model_name (str): The name of the model.
+        zip_path (str): Path to the release archive.
+        app_type (str): 'web_app' or 'inference_app'.
+
+    Returns:
+        str: Directory containing the extracted app files.
+    """
+    model_cache = os.path.join(RELEASE_CACHE_DIR, secure_filename(model_name))
+    key = release_key(zip_path)
+    release_dir = os.path.join(model_cache, key)
+    app_dir = os.path.join(release_dir, app_type)
+
+    with release_cache_lock:
+        extract_lock = release_extract_locks.setdefault(app_dir, threading.Lock())
+
+    with extract_lock:
+        if os.path.isdir(app_dir):
+            return app_dir
+
+        os.makedirs(release_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{app_type}-", dir=release_dir)
+        try:
+            written = extract_archive(zip_path, staging, prefix=app_type, skip=[f"{app_type}.zip"])
+            _set_tree_writable(staging, False)
+            os.replace(staging, app_dir)
+        except Exception:
+            _remove_read_only_tree(staging)
+            raise
+
+        with release_cache_lock:
+            for old_key in os.listdir(model_cache):
+                if old_key != key and not old_key.startswith("."):
+                    _remove_read_only_tree(os.path.join(model_cache, old_key))
+        print(f"Extracted {app_type} of release {key} for {model_name} ({written} bytes) into {app_dir}")
+    return app_dir
+
+def _reflink(src, dst):
+    """
+    Clones a file's extents (copy-on-write) on filesystems that support it.
+    """
+    import fcntl
+    FICLONE = 0x40049409
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+def materialize_file(src, dst):
+    """
+    Places src at dst as cheaply as the filesystem allows.
+
+    Returns:
+        str: The method that succeeded ("hardlink", "reflink" or "copy").
+    """
+    methods = ["hardlink", "reflink", "copy"]
+    for method in methods[methods.index(INSTANCE_MATERIALIZE) if INSTANCE_MATERIALIZE in methods else 0:]:
+        try:
+            if method == "hardlink":
+                os.link(src, dst)
+            elif method == "reflink":
+                _reflink(src, dst)
+            else:
+                shutil.copy2(src, dst)
+            if method != "hardlink":
+                # Clones and copies of read-only cache files are the
+                # instance's own, so they stay writable
+                os.chmod(dst, os.stat(dst).st_mode | 0o200)
+            return method
+        except (OSError, ImportError):
+            if os.path.exists(dst) and method != "hardlink":
+                os.remove(dst)
+    raise OSError(f"Could not materialize {src}")
+
+def materialize_tree(src_dir, dst_dir):
+    """
+    Recreates src_dir under dst_dir with real directories and cloned (or,
+    with INSTANCE_MATERIALIZE=hardlink, linked) files, so on filesystems with
+    reflink support the cost is proportional to the number of files, not
+    their size.
+
+    Returns:
+        dict: Number of files materialized per method.
+    """
+    counts = {}
+    for root, dirs, files in os.walk(src_dir):
+        target_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for file in files:
+            target = os.path.join(target_root, file)
+            if os.path.lexists(target):
+                os.remove(target)
+            method = materialize_file(os.path.join(root, file), target)
+            counts[method] = counts.get(method, 0) + 1
+    return counts
+
+# Intra-op threads per inference instance; 0 splits the cores evenly across
+# the model's maximum instance count
+INFERENCE_THREADS_PER_INSTANCE = int(os.environ.get("INFERENCE_THREADS_PER_INSTANCE", 0))
+
+# Worker processes per inference instance; above 1 the instance runs under a
+# preforking server instead of "flask run". Per model:
+#   "instance_workers": {"inference_app": int}
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 1))
+PREFORK_WORKER_THREADS = int(os.environ.get("PREFORK_WORKER_THREADS", 4))
+PREFORK_SERVER_REQUIREMENT = "gunicorn"
+
+def inference_threads_per_instance(descriptor, workers=1):
+    """
+    Returns the torch thread count to give each worker of a new
+    inference_app instance. The cores are split across the most instances
+    the model's autoscaler or warm pool may run, or given to a single
+    instance when neither is enabled.
+    """
+    if INFERENCE_THREADS_PER_INSTANCE > 0:
+        return INFERENCE_THREADS_PER_INSTANCE
+    max_instances = max(
+        [config["max_instances"] for config in (autoscale_config(descriptor), warm_pool_config(descriptor)) if config] or [1]
+    )
+    return max(1, (os.cpu_count() or 1) // (max_instances * max(1, workers)))
+
+def instance_workers(descriptor, app_type):
+    """
+    Returns how many worker processes an instance of app_type should run.
+    Only inference apps are preforked, and not on Windows (no fork).
+    """
+    if app_type != "inference_app" or os.name == "nt":
+        return 1
+    workers = (descriptor.get("instance_workers") or {}).get(app_type, INFERENCE_WORKERS)
+    return max(1, int(workers))
+
+def with_instance_env(descriptor, app_type, overrides):
+    """
+    Returns a copy of the descriptor whose instance_env for app_type is
+    extended with overrides, leaving the cached descriptor untouched.
+    """
+    import copy
+    descriptor = copy.deepcopy(descriptor)
+    instance_env = descriptor.setdefault("instance_env", {})
+    instance_env.setdefault(app_type, {}).update(overrides)
+    return descriptor
+
+def deploy_instance(model_name, zip_path, descriptor, app_type, locked=False):
     """
     Deploys a single instance of a specific app type (web_app or inference_app).
     Uses absolute paths to ensure consistency across different environments.
@@ -84,6 +770,8 @@ def deploy_instance(model_name, zip_path, descriptor, app_type):
         zip_path (str): Path to the deployment ZIP file.
         descriptor (dict): Model descriptor data.
         app_type (str): Type of app to deploy - 'web_app' or 'inference_app'.
+        locked (bool, optional): True when the caller already holds the
+            deployment lock of this model and app type (batch scale-out).
         
     Returns:
         dict: Information about the deployed instance.
@@ -94,12 +782,13 @@ def deploy_instance(model_name, zip_path, descriptor, app_type):
     # Define a unique lock key for this model and app type
     lock_key = f"{model_name}_{app_type}"
     
-    # Check if deployment is already in progress
-    if lock_key in deployment_locks and deployment_locks[lock_key]:
-        raise RuntimeError(f"Deployment of {app_type} for {model_name} is already in progress")
-    
-    # Set the deployment lock
-    deployment_locks[lock_key] = True
+    if not locked:
+        # Check if deployment is already in progress
+        if lock_key in deployment_locks and deployment_locks[lock_key]:
+            raise RuntimeError(f"Deployment of {app_type} for {model_name} is already in progress")
+        
+        # Set the deployment lock
+        deployment_locks[lock_key] = True
     
     try:
         # Generate instance ID
@@ -135,7 +824,8 @@ def deploy_instance(model_name, zip_path, descriptor, app_type):
             "status": "initializing",
             "url": f"http://localhost:{port}",
             "created_at": datetime.datetime.now().isoformat(),
-            "deploying": True
+            "deploying": True,
+            "model_name": model_name
         }
         
         # Add to registry based on app type
@@ -149,22 +839,14 @@ def deploy_instance(model_name, zip_path, descriptor, app_type):
         # Create app directory with absolute path
         app_dir = os.path.join(deployed_dir, f"{app_type}_{instance_id}")
         os.makedirs(app_dir, exist_ok=True)
+        log_file = os.path.join(app_dir, "app.log")
+        deploy_started = time.time()
         
-        # Extract app files from zip
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(temp_dir)
-            
-            # Copy app-specific files
-            app_src = os.path.join(temp_dir, app_type)
-            if os.path.exists(app_src):
-                for item in os.listdir(app_src):
-                    s = os.path.join(app_src, item)
-                    d = os.path.join(app_dir, item)
-                    if os.path.isdir(s):
-                        shutil.copytree(s, d, dirs_exist_ok=True)
-                    else:
-                        shutil.copy2(s, d)
+        # Link app files from the release extracted once into the release cache
+        with timed_phase(log_file, "materialize"):
+            app_src = get_extracted_release(model_name, zip_path, app_type)
+            methods = materialize_tree(app_src, app_dir)
+            log_message(log_file, f"Materialized {app_type} from {app_src}: {methods}")
         
         # Create app-specific descriptor
         app_descriptor = descriptor.copy()
@@ -174,75 +856,53 @@ def deploy_instance(model_name, zip_path, descriptor, app_type):
         app_descriptor["port"] = port
         app_descriptor["app_dir"] = app_dir  # Store absolute directory path
         
-        # For web app, find an available inference API
-        available_inference_api = None
-        if app_type == "web_app" and model_name in app_servers:
-            for inf_app in app_servers[model_name]["inference_apps"]:
-                if inf_app["status"] == "running":
-                    available_inference_api = inf_app["url"]
-                    app_descriptor["inference_api_url"] = available_inference_api
-                    break
-        
-        # Write descriptor file
-        descriptor_path = os.path.join(app_dir, "descriptor.json")
-        with open(descriptor_path, "w") as f:
-            json.dump(app_descriptor, f, indent=4)
-        
         # Setup logging with absolute path
-        log_file = os.path.join(app_dir, "app.log")
         log_message(log_file, f"Setting up {app_type} for {model_name} on port {port}")
         log_message(log_file, f"Application directory: {app_dir}")
         
-        # Create and setup virtual environment with absolute path
-        venv_dir = os.path.join(app_dir, "venv")
-        subprocess.run(["python", "-m", "venv", venv_dir], check=True)
-        
-        # Get platform-specific pip path
-        pip = os.path.join(venv_dir, "bin", "pip") if os.name != "nt" else os.path.join(venv_dir, "Scripts", "pip")
-        subprocess.run([pip, "install", "--upgrade", "pip"], check=True)
+        # Reuse (or build once) the shared environment for this requirement set
+        requirements = resolve_app_requirements(descriptor, app_type, app_dir)
+        workers = instance_workers(descriptor, app_type)
+        if workers > 1:
+            requirements = merge_requirements(requirements, [PREFORK_SERVER_REQUIREMENT])
+        log_message(log_file, f"Resolving environment for {app_type} ({len(requirements)} requirements)")
+        wheelhouse = release_wheelhouse(zip_path) or PIP_WHEELHOUSE
+        with timed_phase(log_file, "environment"):
+            venv_dir, venv_key, cache_hit = get_or_build_venv(requirements, log_file, wheelhouse=wheelhouse)
+        instance["venv_key"] = venv_key
+        instance["venv_dir"] = venv_dir
+        log_message(log_file, f"Environment {venv_key} {'cache hit' if cache_hit else 'built'}: {venv_dir}")
         
-        # Install dependencies one by one
-        log_message(log_file, f"Installing dependencies for {app_type}")
-        
-        # Try to install from descriptor
-        requirements_installed = False
-        req_key = app_type if app_type in descriptor.get("requirements", {}) else None
-        
-        if req_key and descriptor["requirements"].get(req_key):
-            log_message(log_file, f"Installing dependencies from descriptor ({len(descriptor['requirements'][req_key])} packages)")
-            for req in descriptor["requirements"][req_key]:
-                try:
-                    log_message(log_file, f"Installing: {req}")
-                    subprocess.run([pip, "install", req], check=True)
-                    log_message(log_file, f"Successfully installed: {req}")
-                except Exception as e:
-                    log_message(log_file, f"Error installing {req}: {e}")
+        # For web app, find an available inference API. Resolved only now, once
+        # the environment is ready, and when the model's inference app is still
+        # being deployed (e.g. alongside this web app) it is waited for
+        available_inference_api = None
+        if app_type == "web_app":
+            def ready_inference_app():
+                return next((i for i in app_servers[model_name]["inference_apps"] if is_instance_routable(i)), None)
+            inf_app = ready_inference_app()
+            if inf_app is None and is_inference_deploying(model_name):
+                log_message(log_file, "Waiting for the inference app to become ready")
+                with timed_phase(log_file, "inference wait"):
+                    deadline = time.time() + PROXY_DEPLOY_WAIT_SECONDS
+                    while inf_app is None and is_inference_deploying(model_name) and time.time() < deadline:
+                        time.sleep(0.5)
+                        inf_app = ready_inference_app()
+            if inf_app is not None:
+                available_inference_api = inf_app["url"]
+                app_descriptor["inference_api_url"] = available_inference_api
+            else:
+                log_message(log_file, "No ready inference app, starting without INFERENCE_API_URL")
         
-        # Try requirements.txt if available
-        req_file = os.path.join(app_dir, "requirements.txt")
-        if os.path.exists(req_file):
-            log_message(log_file, f"Installing dependencies from requirements.txt: {req_file}")
-            try:
-                # Read requirements.txt file and install packages one by one
-                with open(req_file, "r") as f:
-                    requirements = [line.strip() for line in f if line.strip() and not line.startswith("#")]
-                
-                log_message(log_file, f"Found {len(requirements)} packages in requirements.txt")
-                for req in requirements:
-                    try:
-                        log_message(log_file, f"Installing: {req}")
-                        subprocess.run([pip, "install", req], check=True)
-                        log_message(log_file, f"Successfully installed: {req}")
-                    except Exception as e:
-                        log_message(log_file, f"Error installing {req}: {e}")
-                
-                requirements_installed = True
-                log_message(log_file, "Completed installing dependencies from requirements.txt")
-            except Exception as e:
-                log_message(log_file, f"Error reading requirements.txt: {e}")
+        # Write descriptor file (unlinking first: it may share an inode with the release cache)
+        descriptor_path = os.path.join(app_dir, "descriptor.json")
+        if os.path.exists(descriptor_path):
+            os.remove(descriptor_path)
+        with open(descriptor_path, "w") as f:
+            json.dump(app_descriptor, f, indent=4)
         
         # Launch the app using absolute paths
-        python_path = os.path.join(venv_dir, "bin", "python") if os.name != "nt" else os.path.join(venv_dir, "Scripts", "python")
+        python_path = venv_bin(venv_dir, "python")
         env_vars = os.environ.copy()
         env_vars["PORT"] = str(port)
         env_vars["FLASK_RUN_PORT"] = str(port)
@@ -250,6 +910,28 @@ def deploy_instance(model_name, zip_path, descriptor, app_type):
         env_vars["INSTANCE_ID"] = instance_id
         env_vars["APP_DIR"] = app_dir  # Pass the app directory as an environment variable
         
+        # Split the host's cores between the model's inference instances so
+        # several torch processes don't oversubscribe the CPU
+        if app_type == "inference_app":
+            threads = inference_threads_per_instance(descriptor, workers)
+            for key in ("TORCH_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+                env_vars[key] = str(threads)
+            env_vars["TORCH_NUM_INTEROP_THREADS"] = "1"
+            
+            # Point the instance at the host-wide copy of its weights
+            if SHARE_MODEL_WEIGHTS:
+                shared = share_instance_weights(app_dir, descriptor, log_file)
+                instance["shared_weights"] = list(shared.values())
+                if shared:
+                    env_vars["SHARED_WEIGHTS"] = json.dumps(shared)
+                    env_vars["MODEL_WEIGHTS_PATH"] = next(iter(shared.values()))
+                    env_vars["WEIGHTS_MMAP"] = "1"
+        
+        # Per app type tuning knobs from the descriptor, e.g.
+        # "instance_env": {"inference_app": {"BATCH_MAX_SIZE": 32, "INFERENCE_MODE": "torchscript"}}
+        for key, value in (descriptor.get("instance_env") or {}).get(app_type, {}).items():
+            env_vars[key] = str(value)
+        
         # Set inference API URL for web app
         if app_type == "web_app" and available_inference_api:
             env_vars["INFERENCE_API_URL"] = available_inference_api
@@ -263,29 +945,24 @@ def deploy_instance(model_name, zip_path, descriptor, app_type):
         
         app_file_path = os.path.join(app_dir, app_file)
         env_vars["FLASK_APP"] = app_file_path  # Use absolute path for Flask app
+        instance["workers"] = workers
+        instance["launch"] = {
+            "python": python_path,
+            "app_file": app_file,
+            "app_dir": app_dir,
+            "workers": workers,
+            "env": env_vars,
+            "readiness_path": readiness_path(descriptor, app_type)
+        }
         
-        # Log the command that will be executed
-        log_message(log_file, f"Running command: {python_path} -m flask run --host=0.0.0.0 --port {port}")
-        log_message(log_file, f"Working directory: {app_dir}")
-        log_message(log_file, f"App file: {app_file_path}")
-        
-        # Launch process with absolute paths
-        proc = subprocess.Popen(
-            [python_path, "-m", "flask", "run", "--host=0.0.0.0", "--port", str(port)],
-            env=env_vars,
-            cwd=app_dir,  # Use absolute path for working directory
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            start_new_session=True
-        )
+        proc = start_instance_process(instance, log_file)
         
         log_message(log_file, f"{app_type} process started with PID {proc.pid}")
+        log_message(log_file, f"[timing] deploy total {round(time.time() - deploy_started, 2)}s")
         
-        # Update instance record
-        instance["process"] = proc
-        instance["status"] = "running"
-        instance["deploying"] = False
+        # Update instance record; it becomes routable once the prober sees it answer
         instance["app_dir"] = app_dir  # Store absolute path in instance record
+        start_readiness_probe(instance, log_file)
         
         return instance
     except Exception as e:
@@ -296,50 +973,346 @@ def deploy_instance(model_name, zip_path, descriptor, app_type):
         raise
     finally:
         # Release the lock regardless of success or failure
-        deployment_locks[lock_key] = False
+        if not locked:
+            deployment_locks[lock_key] = False
 
-# Add a background deployment function
-def deploy_in_background(model_name, zip_path, descriptor, app_type=None):
+#############################################
+# Instance Output Capture                   #
+#############################################
+# An instance's stdout and stderr share one pipe that a daemon thread keeps
+# drained into the instance's app.log, so a chatty app never blocks on a full
+# pipe buffer. app.log is rotated to app.log.1 .. app.log.N once it exceeds
+# INSTANCE_LOG_MAX_BYTES, keeping INSTANCE_LOG_BACKUPS old files.
+
+INSTANCE_LOG_MAX_BYTES = int(os.environ.get("INSTANCE_LOG_MAX_BYTES", 10 * 1024 * 1024))
+INSTANCE_LOG_BACKUPS = int(os.environ.get("INSTANCE_LOG_BACKUPS", 3))
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+def rotate_log_file(log_file, backups=None):
     """
-    Deploy model components in background thread.
-    When app_type is None, deploys both web and inference apps simultaneously.
-    
-    Args:
-        model_name (str): Model name
-        zip_path (str): Path to deployment package
-        descriptor (dict): Model descriptor
-        app_type (str, optional): Type of app to deploy ('web_app' or 'inference_app'). 
-                                 If None, deploys both components simultaneously.
+    Shifts log_file to log_file.1 (and .1 to .2, ...), dropping the oldest.
+    """
+    backups = INSTANCE_LOG_BACKUPS if backups is None else backups
+    if backups <= 0:
+        open(log_file, "w").close()
+        return
+    for index in range(backups - 1, 0, -1):
+        older = f"{log_file}.{index}"
+        if os.path.exists(older):
+            os.replace(older, f"{log_file}.{index + 1}")
+    if os.path.exists(log_file):
+        os.replace(log_file, f"{log_file}.1")
+
+def capture_output(pipe, log_file):
+    """
+    Copies a process's output pipe into log_file until the process closes
+    it, rotating the file when it grows past INSTANCE_LOG_MAX_BYTES.
     """
+    fd = pipe.fileno()
+    out = open(log_file, "ab")
     try:
-        if app_type:
-            # Deploy single component
-            instance = deploy_instance(model_name, zip_path, descriptor, app_type)
-            
-            # Update descriptor with new instance info
-            release_folder = os.path.join(UPLOAD_FOLDER, secure_filename(model_name), "release")
-            descriptor_path = os.path.join(release_folder, "descriptor.json")
-            
-            with open(descriptor_path, 'r') as f:
-                descriptor_data = json.load(f)
-            
-            if "instances" not in descriptor_data:
-                descriptor_data["instances"] = []
-                
-            descriptor_data["instances"].append({
-                "id": instance["id"],
-                "type": app_type,
-                "port": instance["port"],
-                "created_at": instance["created_at"]
-            })
-            
-            with open(descriptor_path, 'w') as f:
-                json.dump(descriptor_data, f, indent=4)
-                
-            print(f"Successfully deployed {app_type} for {model_name}")
-        else:
-            # Deploy both components simultaneously using threads
-            results = {"web_app": None, "inference_app": None}
+        while True:
+            chunk = os.read(fd, OUTPUT_CHUNK_SIZE)
+            if not chunk:
+                break
+            out.write(chunk)
+            out.flush()
+            # tell() in append mode includes lines log_message added meanwhile
+            if out.tell() >= INSTANCE_LOG_MAX_BYTES:
+                out.close()
+                rotate_log_file(log_file)
+                out = open(log_file, "ab")
+    except OSError as e:
+        print(f"Output capture for {log_file} stopped: {e}")
+    finally:
+        out.close()
+        pipe.close()
+
+def start_output_capture(proc, log_file):
+    """
+    Drains a launched process's combined stdout/stderr in the background.
+    """
+    threading.Thread(target=capture_output, args=(proc.stdout, log_file), daemon=True).start()
+
+LOG_READ_MAX_BYTES = 1024 * 1024
+LOG_READ_DEFAULT_BYTES = 64 * 1024
+LOG_FOLLOW_POLL = 0.5
+LOG_FOLLOW_MAX_SECONDS = 300  # EventSource reconnects with Last-Event-ID
+
+def read_log_range(log_file, offset, limit):
+    """
+    Reads up to `limit` bytes of a log from byte `offset`. An offset past the
+    end of the file means it was rotated since, so reading restarts at 0.
+
+    Returns:
+        tuple: (data bytes, start offset, file size)
+    """
+    if not os.path.exists(log_file):
+        return b"", 0, 0
+    with open(log_file, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if offset > size:
+            offset = 0
+        f.seek(offset)
+        return f.read(limit), offset, size
+
+def read_log_tail(log_file, lines, limit):
+    """
+    Reads the last `lines` lines of a log (at most `limit` bytes), scanning
+    backwards from the end in blocks.
+
+    Returns:
+        tuple: (data bytes, start offset, file size)
+    """
+    if not os.path.exists(log_file):
+        return b"", 0, 0
+    with open(log_file, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if lines <= 0:
+            return b"", size, size
+        start = size
+        newlines = 0
+        while start > 0 and size - start < limit:
+            block = min(OUTPUT_CHUNK_SIZE, start, limit - (size - start))
+            start -= block
+            f.seek(start)
+            newlines += f.read(block).count(b"\n")
+            if newlines > lines:
+                break
+        f.seek(start)
+        data = f.read(size - start)
+    # Start at a line boundary when the byte limit cut into a line
+    if start > 0 and newlines <= lines:
+        cut = data.find(b"\n")
+        if 0 <= cut < len(data) - 1:
+            start += cut + 1
+            data = data[cut + 1:]
+    # Drop everything before the requested number of lines
+    parts = data.split(b"\n")
+    keep = lines + 1 if data.endswith(b"\n") else lines
+    if len(parts) > keep:
+        dropped = b"\n".join(parts[:-keep]) + b"\n"
+        start += len(dropped)
+        data = data[len(dropped):]
+    return data, start, size
+
+def follow_log(log_file, offset, max_seconds=LOG_FOLLOW_MAX_SECONDS):
+    """
+    Yields server-sent events with the complete lines appended to a log from
+    `offset` on. Each event id is the offset after its lines, so a client
+    reconnecting with Last-Event-ID continues where it left off. A rotation
+    is detected by the file's inode changing (or, on the first read, by
+    `offset` lying past its end) and restarts at the new file's beginning.
+    """
+    deadline = time.time() + max_seconds
+    idle_since = time.time()
+    inode = None
+    yield "retry: 1000\n\n"
+    while time.time() < deadline:
+        try:
+            with open(log_file, "rb") as f:
+                stat = os.fstat(f.fileno())
+                start = offset
+                if (inode is not None and stat.st_ino != inode) or offset > stat.st_size:
+                    start = 0
+                inode = stat.st_ino
+                f.seek(start)
+                data = f.read(LOG_READ_MAX_BYTES)
+        except FileNotFoundError:
+            # Between a rotation's rename and the new file being created
+            data, start = b"", offset
+        if start != offset:
+            yield "event: rotated\ndata: \n\n"
+        end = data.rfind(b"\n")
+        if end >= 0 or len(data) == LOG_READ_MAX_BYTES:
+            data = data[:end + 1] if end >= 0 else data
+            offset = start + len(data)
+            lines = data.decode("utf-8", errors="replace").rstrip("\n").split("\n")
+            yield f"id: {offset}\n" + "".join(f"data: {line}\n" for line in lines) + "\n"
+            idle_since = time.time()
+            continue
+        offset = start
+        if time.time() - idle_since > 15:
+            yield ": keep-alive\n\n"
+            idle_since = time.time()
+        time.sleep(LOG_FOLLOW_POLL)
+
+def instance_command(launch, port):
+    """
+    Builds the server command line of an instance from its launch spec.
+    """
+    if launch["workers"] > 1:
+        # Preforking server: the app (and its model) is imported once in the
+        # master with --preload and shared copy-on-write by the workers
+        return [
+            launch["python"], "-m", "gunicorn", "--preload",
+            "--workers", str(launch["workers"]), "--worker-class", "gthread",
+            "--threads", str(PREFORK_WORKER_THREADS),
+            "--bind", f"0.0.0.0:{port}", "--chdir", launch["app_dir"],
+            f"{os.path.splitext(launch['app_file'])[0]}:app"
+        ]
+    return [launch["python"], "-m", "flask", "run", "--host=0.0.0.0", "--port", str(port)]
+
+def start_instance_process(instance, log_file):
+    """
+    Starts the server process of an instance on instance["port"] from its
+    launch spec. Used for new deployments and for resuming suspended ones.
+
+    Returns:
+        Popen: The started process.
+    """
+    launch = instance["launch"]
+    port = instance["port"]
+    env_vars = dict(launch["env"], PORT=str(port), FLASK_RUN_PORT=str(port), PYTHONUNBUFFERED="1")
+    # A restarted or resumed web app points at an inference app that is ready
+    # now; the one it was first launched against may be gone
+    model_data = app_servers.get(instance.get("model_name"), {})
+    if any(i is instance for i in model_data.get("web_apps", [])):
+        inf_app = next((i for i in model_data.get("inference_apps", []) if is_instance_routable(i)), None)
+        if inf_app is not None:
+            env_vars["INFERENCE_API_URL"] = launch["env"]["INFERENCE_API_URL"] = inf_app["url"]
+    command = instance_command(launch, port)
+    
+    # Log the command that will be executed
+    log_message(log_file, f"Running command: {' '.join(command)}")
+    log_message(log_file, f"Working directory: {launch['app_dir']}")
+    log_message(log_file, f"App file: {env_vars['FLASK_APP']}")
+    
+    # Launch process with absolute paths
+    proc = subprocess.Popen(
+        command,
+        env=env_vars,
+        cwd=launch["app_dir"],  # Use absolute path for working directory
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True
+    )
+    start_output_capture(proc, log_file)
+    instance["process"] = proc
+    instance["launched_at"] = instance["last_request_at"] = time.time()
+    return proc
+
+#############################################
+# Readiness Probing                         #
+#############################################
+# A launched instance stays "starting" (and deploying) until it answers: a
+# TCP connect to its port, then an HTTP GET of its readiness path returning
+# a non-5xx status (a 404 still proves the app is serving). Probes back off
+# exponentially from READINESS_BACKOFF_INITIAL to READINESS_BACKOFF_MAX.
+# Instances that exit or miss READINESS_TIMEOUT are marked "failed".
+
+READINESS_TIMEOUT = float(os.environ.get("READINESS_TIMEOUT", 300))
+READINESS_HTTP_TIMEOUT = float(os.environ.get("READINESS_HTTP_TIMEOUT", 2))
+READINESS_BACKOFF_INITIAL = 0.05
+READINESS_BACKOFF_MAX = 2.0
+READINESS_PATHS = {"web_app": "/", "inference_app": "/health"}
+
+def readiness_path(descriptor, app_type):
+    """
+    Returns the readiness path of an app type, overridable in the descriptor
+    with "readiness_path": {"inference_app": "/health"}.
+    """
+    return (descriptor.get("readiness_path") or {}).get(app_type, READINESS_PATHS[app_type])
+
+def check_instance_ready(instance, path):
+    """
+    Returns True if the instance accepts connections and answers `path`
+    with a non-5xx status.
+    """
+    try:
+        with socket.create_connection(("127.0.0.1", instance["port"]), timeout=READINESS_HTTP_TIMEOUT):
+            pass
+        resp = requests.get(f"http://127.0.0.1:{instance['port']}{path}", timeout=READINESS_HTTP_TIMEOUT)
+    except (OSError, requests.RequestException):
+        return False
+    return resp.status_code < 500
+
+def probe_readiness(instance, log_file):
+    """
+    Probes a starting instance until it is ready, then makes it routable
+    and records its boot time.
+
+    Returns:
+        bool: True if the instance became ready.
+    """
+    path = instance["launch"].get("readiness_path", "/")
+    deadline = time.time() + READINESS_TIMEOUT
+    delay = READINESS_BACKOFF_INITIAL
+    while time.time() < deadline:
+        if instance["status"] != "starting":
+            instance["deploying"] = False  # stopped while starting
+            return False
+        if not is_instance_alive(instance):
+            log_message(log_file, f"Process exited with code {instance['process'].poll()} before becoming ready")
+            instance["status"] = "failed"
+            instance["deploying"] = False
+            return False
+        if check_instance_ready(instance, path):
+            instance["ready_at"] = time.time()
+            instance["boot_seconds"] = round(instance["ready_at"] - instance["launched_at"], 2)
+            instance["status"] = "running"
+            instance["deploying"] = False
+            log_message(log_file, f"[timing] ready after {instance['boot_seconds']}s")
+            return True
+        time.sleep(delay)
+        delay = min(delay * 2, READINESS_BACKOFF_MAX)
+
+    log_message(log_file, f"Not ready after {READINESS_TIMEOUT}s, stopping")
+    terminate_instance(instance)
+    instance["status"] = "failed"
+    instance["deploying"] = False
+    return False
+
+def start_readiness_probe(instance, log_file):
+    """
+    Marks a launched instance as starting and probes it in the background.
+    """
+    instance["status"] = "starting"
+    instance["deploying"] = True
+    threading.Thread(target=probe_readiness, args=(instance, log_file), daemon=True).start()
+
+# Add a background deployment function
+def deploy_in_background(model_name, zip_path, descriptor, app_type=None):
+    """
+    Deploy model components in background thread.
+    When app_type is None, deploys both web and inference apps simultaneously.
+    
+    Args:
+        model_name (str): Model name
+        zip_path (str): Path to deployment package
+        descriptor (dict): Model descriptor
+        app_type (str, optional): Type of app to deploy ('web_app' or 'inference_app'). 
+                                 If None, deploys both components simultaneously.
+    """
+    try:
+        if app_type:
+            # Deploy single component
+            instance = deploy_instance(model_name, zip_path, descriptor, app_type)
+            
+            # Update descriptor with new instance info
+            release_folder = os.path.join(UPLOAD_FOLDER, secure_filename(model_name), "release")
+            descriptor_path = os.path.join(release_folder, "descriptor.json")
+            
+            with open(descriptor_path, 'r') as f:
+                descriptor_data = json.load(f)
+            
+            if "instances" not in descriptor_data:
+                descriptor_data["instances"] = []
+                
+            descriptor_data["instances"].append({
+                "id": instance["id"],
+                "type": app_type,
+                "port": instance["port"],
+                "created_at": instance["created_at"]
+            })
+            
+            with open(descriptor_path, 'w') as f:
+                json.dump(descriptor_data, f, indent=4)
+                
+            print(f"Successfully deployed {app_type} for {model_name}")
+        else:
+            # Deploy both components simultaneously using threads
+            results = {"web_app": None, "inference_app": None}
             deployment_errors = []
             
             def deploy_component(component_type):
@@ -421,221 +1394,1589 @@ def deploy_in_background(model_name, zip_path, descriptor, app_type=None):
     except Exception as e:
         print(f"Error in background deployment: {str(e)}")
 
-def deploy_model(model_name, zip_path, descriptor):
+def deploy_model(model_name, zip_path, descriptor):
+    """
+    Deploy both web app and inference app as separate instances simultaneously.
+    """
+    results = {"web_app": None, "inference_app": None}
+    errors = []
+    
+    def deploy_component(component_type):
+        try:
+            results[component_type] = deploy_instance(model_name, zip_path, descriptor, component_type)
+        except Exception as e:
+            error_msg = f"Error deploying {component_type}: {str(e)}"
+            errors.append(error_msg)
+    
+    # Create threads for parallel deployment
+    web_thread = threading.Thread(target=deploy_component, args=("web_app",))
+    inf_thread = threading.Thread(target=deploy_component, args=("inference_app",))
+    
+    # Start threads
+    inf_thread.start()
+    web_thread.start()
+    
+    # Wait for completion
+    inf_thread.join()
+    web_thread.join()
+    
+    # Check for errors
+    if errors:
+        raise Exception("; ".join(errors))
+    
+    # Return results
+    return {
+        "web_app": {
+            "instance_id": results["web_app"]["id"],
+            "port": results["web_app"]["port"]
+        },
+        "inference_app": {
+            "instance_id": results["inference_app"]["id"],
+            "port": results["inference_app"]["port"]
+        }
+    }
+
+#############################################
+# Scaling                                   #
+#############################################
+# Brings an app type of a model to a desired number of replicas. The delta is
+# deployed concurrently under one hold of the per-type deployment lock, after
+# preparing the release extraction and the shared venv once for the batch.
+
+SCALE_MAX_PARALLEL = int(os.environ.get("SCALE_MAX_PARALLEL", 4))
+SCALE_MAX_REPLICAS = int(os.environ.get("SCALE_MAX_REPLICAS", 32))
+SCALE_DRAIN_TIMEOUT = float(os.environ.get("SCALE_DRAIN_TIMEOUT", 30))
+
+def terminate_instance(instance):
+    """
+    Stops an instance's process and drops its proxy connections.
+    """
+    if instance["process"]:
+        try:
+            instance["process"].terminate()
+            instance["status"] = "stopped"
+        except:
+            pass
+    close_proxy_session(instance)
+
+def drain_instance(instance, timeout=None):
+    """
+    Takes an instance out of routing and stops it in the background once its
+    in-flight requests have finished, or after SCALE_DRAIN_TIMEOUT seconds.
+    """
+    instance["status"] = "draining"
+    deadline = time.time() + (SCALE_DRAIN_TIMEOUT if timeout is None else timeout)
+
+    def wait_and_stop():
+        while instance.get("in_flight", 0) > 0 and time.time() < deadline:
+            time.sleep(0.2)
+        terminate_instance(instance)
+
+    threading.Thread(target=wait_and_stop, daemon=True).start()
+
+def live_instances(model_name, app_type):
+    """
+    Returns the instances of an app type that are deploying or running.
+    """
+    instances = app_servers.get(model_name, {}).get(f"{app_type}s", [])
+    return [i for i in instances if i["deploying"] or (i["status"] not in ("stopped", "draining", "suspended") and is_instance_alive(i))]
+
+def requested_replicas(model_name, app_type):
+    """
+    Returns the replica count last requested for an app type through the
+    scale route, or None if it was never scaled explicitly.
+    """
+    return app_servers.get(model_name, {}).get("model_info", {}).get("replicas", {}).get(app_type)
+
+def prepare_deployment(model_name, zip_path, descriptor, app_type):
+    """
+    Runs the per-release preparation steps of deploy_instance once, so the
+    instances of a batch all find the extracted app and its venv cached.
+    """
+    log_file = os.path.join(PROJECT_ROOT, "deployed_models", model_name, f"scale_{app_type}.log")
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    with timed_phase(log_file, "prepare"):
+        app_src = get_extracted_release(model_name, zip_path, app_type)
+        requirements = resolve_app_requirements(descriptor, app_type, app_src)
+        if instance_workers(descriptor, app_type) > 1:
+            requirements = merge_requirements(requirements, [PREFORK_SERVER_REQUIREMENT])
+        wheelhouse = release_wheelhouse(zip_path) or PIP_WHEELHOUSE
+        get_or_build_venv(requirements, log_file, wheelhouse=wheelhouse)
+
+def scale_instances(model_name, zip_path, descriptor, app_type, replicas):
+    """
+    Deploys or stops instances of one app type until `replicas` are live.
+    New instances are deployed by a pool of SCALE_MAX_PARALLEL threads; when
+    scaling in, the least busy instances are drained and stopped.
+
+    Args:
+        model_name (str): The name of the model.
+        zip_path (str): Path to the release archive.
+        descriptor (dict): Model descriptor data.
+        app_type (str): 'web_app' or 'inference_app'.
+        replicas (int): Desired number of live instances.
+
+    Returns:
+        dict: Ids of started and stopped instances and deployment errors.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    lock_key = f"{model_name}_{app_type}"
+    if lock_key in deployment_locks and deployment_locks[lock_key]:
+        raise RuntimeError(f"Deployment of {app_type} for {model_name} is already in progress")
+    deployment_locks[lock_key] = True
+
+    result = {"app_type": app_type, "replicas": replicas, "started": [], "stopped": [], "errors": []}
+    try:
+        live = live_instances(model_name, app_type)
+        if len(live) > replicas:
+            surplus = sorted(
+                (i for i in live if not i["deploying"]),
+                key=lambda i: (i.get("in_flight", 0), i["created_at"]),
+            )[:len(live) - replicas]
+            for instance in surplus:
+                drain_instance(instance)
+                result["stopped"].append(instance["id"])
+            return result
+
+        missing = replicas - len(live)
+        if missing <= 0:
+            return result
+
+        started = time.time()
+        prepare_deployment(model_name, zip_path, descriptor, app_type)
+        with ThreadPoolExecutor(max_workers=min(missing, SCALE_MAX_PARALLEL)) as pool:
+            futures = [
+                pool.submit(deploy_instance, model_name, zip_path, descriptor, app_type, True)
+                for _ in range(missing)
+            ]
+            for future in futures:
+                try:
+                    result["started"].append(future.result()["id"])
+                except Exception as e:
+                    result["errors"].append(str(e))
+        print(f"Scaled {app_type} of {model_name} to {replicas} replicas "
+              f"(+{len(result['started'])}) in {round(time.time() - started, 2)}s")
+        return result
+    finally:
+        deployment_locks[lock_key] = False
+
+#############################################
+# Upload Streaming                          #
+#############################################
+# Uploaded archives are written straight to UPLOAD_STAGING_DIR while the
+# multipart body is parsed, and hashed as the bytes pass through. The staged
+# file is then moved (not copied) into the model's src folder. The staging
+# dir sits next to models/ so the move stays on one filesystem. Staged files
+# that were not moved are removed when the request is closed, whichever way
+# the view returned.
+
+UPLOAD_STAGING_DIR = os.path.join(PROJECT_ROOT, "upload_staging")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Form fields that end up in the descriptor; an upload only short-circuits
+# re-packaging when these are unchanged as well.
+PACKAGE_FORM_FIELDS = ("version", "author", "description", "min_idle", "max_instances", "busy_in_flight")
+
+class HashingUploadFile:
+    """
+    Writable spool file for one uploaded file part that keeps a running
+    SHA-256 of everything written to it.
+    """
+    def __init__(self):
+        import hashlib
+        os.makedirs(UPLOAD_STAGING_DIR, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=UPLOAD_STAGING_DIR, prefix="upload-", delete=False)
+        self.path = self.file.name
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = HashingUploadFile()
+        self.__dict__.setdefault("staged_uploads", []).append(stream)
+        return stream
+
+    def close(self):
+        # Flask closes every request when its context is popped
+        try:
+            super().close()
+        finally:
+            for stream in self.__dict__.pop("staged_uploads", []):
+                stream.discard()
+
+app.request_class = UploadRequest
+
+def upload_sha256(file_storage):
+    """
+    Returns the SHA-256 of an uploaded file, computed while it was received
+    when possible, otherwise by reading it in chunks.
+    """
+    import hashlib
+    if isinstance(file_storage.stream, HashingUploadFile):
+        return file_storage.stream.digest.hexdigest()
+    digest = hashlib.sha256()
+    file_storage.stream.seek(0)
+    for chunk in iter(lambda: file_storage.stream.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file_storage.stream.seek(0)
+    return digest.hexdigest()
+
+def store_upload(file_storage, dest_path):
+    """
+    Moves an uploaded file to dest_path, falling back to a chunked copy when
+    it was not spooled to disk by UploadRequest.
+    """
+    stream = file_storage.stream
+    if isinstance(stream, HashingUploadFile):
+        stream.file.close()
+        os.replace(stream.path, dest_path)
+    else:
+        stream.seek(0)
+        with open(dest_path, "wb") as f:
+            shutil.copyfileobj(stream, f, UPLOAD_CHUNK_SIZE)
+
+#############################################
+# Packaging Function                       #
+#############################################
+# Members whose content is already compressed (archives, images) or is
+# dense binary (model weights) are stored as-is: deflating them costs a
+# full pass over the bytes and saves next to nothing.
+PACKAGE_STORED_EXTENSIONS = (
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".whl",
+    ".pt", ".pth", ".onnx", ".h5", ".bin", ".safetensors", ".npy", ".npz",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp",
+)
+
+def list_package_members(app_folders):
+    """
+    Lists the files to include in a release archive.
+
+    Args:
+        app_folders (dict): Maps the app folder name in the archive
+            ('web_app', 'inference_app') to its source folder.
+
+    Returns:
+        list: (file_path, arcname) pairs, without the uploaded app archives
+            (e.g. web_app/web_app.zip) whose contents are already included.
+    """
+    members = []
+    for app_name, folder in app_folders.items():
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                rel_path = os.path.relpath(file_path, folder).replace(os.sep, "/")
+                if rel_path == f"{app_name}.zip":
+                    continue
+                members.append((file_path, f"{app_name}/{rel_path}"))
+    return members
+
+def write_release_zip(zip_path, members, finish=None):
+    """
+    Writes a release archive, storing already-compressed/binary members and
+    deflating the rest. Each member is hashed while it is streamed into the
+    archive, so no separate read pass is needed. Members are compressed one
+    at a time on the calling thread: zipfile has no way to add data deflated
+    elsewhere. The archive is written to a temporary file and moved into
+    place, so readers never see a partial release.
+
+    Args:
+        zip_path (str): Destination archive.
+        members (list): (file_path, arcname) pairs.
+        finish (callable, optional): Called with {arcname: sha256} once the
+            members are written; returns {arcname: bytes} of further members
+            (e.g. descriptors embedding the digests) to append.
+
+    Returns:
+        dict: {arcname: sha256} of the members.
+    """
+    import hashlib
+    hashes = {}
+    tmp_path = f"{zip_path}.tmp"
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
+            for file_path, arcname in members:
+                info = zipfile.ZipInfo.from_file(file_path, arcname=arcname)
+                info.compress_type = zipfile.ZIP_STORED if arcname.lower().endswith(PACKAGE_STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+                digest = hashlib.sha256()
+                with open(file_path, "rb") as src, zipf.open(info, "w", force_zip64=info.file_size > 0x7FFFFFFF) as dst:
+                    for chunk in iter(lambda: src.read(ARCHIVE_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                        dst.write(chunk)
+                hashes[arcname] = digest.hexdigest()
+            for arcname, data in (finish(hashes) if finish else {}).items():
+                zipf.writestr(arcname, data)
+        os.replace(tmp_path, zip_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return hashes
+
+def package_model(model_name, web_app_zip, inference_app_zip, upload=None):
+    """
+    Packages web app (frontend) and inference app (API backend) into a model release.
+    Also creates a descriptor.json file containing model metadata.
+
+    Args:
+        model_name (str): The name of the model to be packaged.
+        web_app_zip (FileStorage): The uploaded zip file for the web application.
+        inference_app_zip (FileStorage): The uploaded zip file for the inference application.
+        upload (dict, optional): Upload fingerprint (archive hashes and form
+            fields) stored in the descriptor to detect unchanged re-uploads.
+
+    Returns:
+        tuple: A tuple containing:
+            - descriptor (dict): The descriptor metadata for the model.
+            - zip_path (str): The file path to the created ZIP package.
+    """
+    from datetime import datetime
+    import json
+    model_folder = os.path.join(UPLOAD_FOLDER, secure_filename(model_name))
+    release_folder = os.path.join(model_folder, "release")
+    src_folder = os.path.join(model_folder, "src")
+    web_app_folder = os.path.join(src_folder, "web_app")
+    inference_app_folder = os.path.join(src_folder, "inference_app")
+    
+    # Create necessary directories with absolute paths
+    os.makedirs(release_folder, exist_ok=True)
+    os.makedirs(src_folder, exist_ok=True)
+    os.makedirs(web_app_folder, exist_ok=True)
+    os.makedirs(inference_app_folder, exist_ok=True)
+    
+    # Log the absolute paths being used
+    print(f"Model folder: {model_folder}")
+    print(f"Release folder: {release_folder}")
+    print(f"Web app folder: {web_app_folder}")
+    print(f"Inference app folder: {inference_app_folder}")
+
+    # Extract web app zip
+    web_app_path = os.path.join(web_app_folder, "web_app.zip")
+    store_upload(web_app_zip, web_app_path)
+    extract_archive(web_app_path, web_app_folder)
+    
+    # Extract inference app zip
+    inference_app_path = os.path.join(inference_app_folder, "inference_app.zip")
+    store_upload(inference_app_zip, inference_app_path)
+    extract_archive(inference_app_path, inference_app_folder)
+    
+    # Read requirements from both apps - FIX: Improved requirement file reading
+    web_app_requirements = []
+    inference_app_requirements = []
+    
+    # Check for requirements.txt in web_app folder
+    web_app_req_path = os.path.join(web_app_folder, "requirements.txt")
+    if os.path.exists(web_app_req_path):
+        with open(web_app_req_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith(("#", "-")):
+                    # Strip version specifiers to get base package name
+                    package = requirement_project(line)
+                    if package:
+                        web_app_requirements.append(package)
+        print(f"Web app requirements: {web_app_requirements}")
+    else:
+        print(f"Warning: requirements.txt not found in {web_app_folder}")
+    
+    # Check for requirements.txt in inference_app folder
+    inference_app_req_path = os.path.join(inference_app_folder, "requirements.txt")
+    if os.path.exists(inference_app_req_path):
+        with open(inference_app_req_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith(("#", "-")):
+                    # Strip version specifiers to get base package name
+                    package = requirement_project(line)
+                    if package:
+                        inference_app_requirements.append(package)
+        print(f"Inference app requirements: {inference_app_requirements}")
+    else:
+        print(f"Warning: requirements.txt not found in {inference_app_folder}")
+    
+    app_folders = {"web_app": web_app_folder, "inference_app": inference_app_folder}
+    # The descriptors are rewritten below, after the members are hashed
+    descriptor_members = {f"{app_name}/descriptor.json": os.path.join(folder, "descriptor.json") for app_name, folder in app_folders.items()}
+    members = [m for m in list_package_members(app_folders) if m[1] not in descriptor_members]
+
+    # Combine unique requirements from both apps
+    all_requirements = list(set(web_app_requirements + inference_app_requirements))
+    
+    # Find model weights files
+    model_weights = []
+    for root, _, files in os.walk(inference_app_folder):
+        for file in files:
+            if file.endswith((".pt", ".pth", ".onnx", ".h5")):
+                rel_path = os.path.relpath(os.path.join(root, file), inference_app_folder)
+                model_weights.append(rel_path)
+
+    # Create descriptor with comprehensive metadata including absolute paths
+    descriptor = {
+        "model_name": model_name,
+        "version": request.form.get("version", "1.0"),
+        "created_at": datetime.now().isoformat(),
+        "author": request.form.get("author", "Unknown"),
+        "description": request.form.get("description", f"Model {model_name}"),
+        "project_root": PROJECT_ROOT,
+        "paths": {
+            "model_folder": model_folder,
+            "release_folder": release_folder,
+            "web_app_folder": web_app_folder,
+            "inference_app_folder": inference_app_folder
+        },
+        "files": {
+            "web_app_folder": "web_app",
+            "inference_app_folder": "inference_app",
+            "model_weights": model_weights,
+            "sha256": {}  # filled in while the release archive is written
+        },
+        "requirements": {
+            "combined": all_requirements,
+            "web_app": web_app_requirements,
+            "inference_app": inference_app_requirements
+        },
+        "warm_pool": warm_pool_form_config(request.form),
+        "upload": upload or {},
+        "interface_type": "dual",  # Indicates both web and inference apps
+        "app_relationship": {
+            "web_app": "frontend",
+            "inference_app": "api_backend"
+        },
+        "instances": [],  # Will store info about instances, not just ports
+        "api_endpoints": {
+            "predict": {
+                "method": "POST",
+                "description": "Make predictions using the model",
+                "parameters": "Depends on the specific model implementation"
+            },
+            "health": {
+                "method": "GET",
+                "description": "Check if the API is running properly"
+            }
+        }
+    }
+
+    descriptor_path = os.path.join(release_folder, "descriptor.json")
+
+    def write_descriptors(member_hashes):
+        # Save descriptor.json in the release folder and, for reference, in
+        # each app folder, then add them to the archive
+        descriptor["files"]["sha256"] = member_hashes
+        data = json.dumps(descriptor, indent=4)
+        for path in [descriptor_path] + list(descriptor_members.values()):
+            with open(path, 'w') as f:
+                f.write(data)
+        return {arcname: data for arcname in ["descriptor.json"] + list(descriptor_members)}
+
+    # Create final zip package for the whole model, descriptor.json at the root
+    zip_filename = f"{secure_filename(model_name)}.zip"
+    zip_path = os.path.join(release_folder, zip_filename)
+    started = time.perf_counter()
+    write_release_zip(zip_path, members, finish=write_descriptors)
+    print(f"Packaged {zip_path} ({os.path.getsize(zip_path)} bytes, {len(members)} members hashed) in {time.perf_counter() - started:.2f}s")
+
+    return descriptor, zip_path
+
+#############################################
+# Wheelhouse Prefetch                       #
+#############################################
+# Optional upload-time stage that builds wheels for both apps into
+# models/<model>/release/wheels/ so deployments install offline.
+
+PREFETCH_WHEELS_DEFAULT = os.environ.get("PREFETCH_WHEELS", "0") == "1"
+
+def release_wheelhouse(zip_path):
+    """
+    Returns the wheelhouse stored next to a release archive, or None when it
+    is missing or was not completely built.
+    """
+    wheels_dir = os.path.join(os.path.dirname(zip_path), "wheels")
+    if os.path.exists(os.path.join(wheels_dir, ".complete")):
+        return wheels_dir
+    return None
+
+def prefetch_wheelhouse(model_name, descriptor):
+    """
+    Downloads or builds wheels for every app's requirement set into the
+    model's release folder and records the result in the release descriptor.
+
+    Args:
+        model_name (str): The name of the model.
+        descriptor (dict): Model descriptor data (updated in place).
+
+    Returns:
+        str: Path to the wheelhouse, or None if prefetching failed.
+    """
+    release_folder = os.path.join(UPLOAD_FOLDER, secure_filename(model_name), "release")
+    wheels_dir = os.path.join(release_folder, "wheels")
+    log_file = os.path.join(release_folder, "wheels.log")
+    app_folders = {
+        "web_app": descriptor["paths"]["web_app_folder"],
+        "inference_app": descriptor["paths"]["inference_app_folder"]
+    }
+
+    # A new release may pin different versions, so start from an empty directory
+    shutil.rmtree(wheels_dir, ignore_errors=True)
+    os.makedirs(wheels_dir, exist_ok=True)
+
+    status = {"path": wheels_dir, "status": "failed", "built_at": None, "wheels": 0}
+    try:
+        with timed_phase(log_file, "wheelhouse prefetch"):
+            for app_type, app_folder in app_folders.items():
+                requirements = resolve_app_requirements(descriptor, app_type, app_folder)
+                if instance_workers(descriptor, app_type) > 1:
+                    requirements = merge_requirements(requirements, [PREFORK_SERVER_REQUIREMENT])
+                if not requirements:
+                    continue
+                req_file = os.path.join(wheels_dir, f"{app_type}.requirements.txt")
+                with open(req_file, "w") as f:
+                    f.write("\n".join(requirements) + "\n")
+                log_message(log_file, f"Building wheels for {app_type}: {', '.join(requirements)}")
+                result = subprocess.run(
+                    [VENV_PYTHON, "-m", "pip", "--disable-pip-version-check", "wheel",
+                     "-r", req_file, "-w", wheels_dir, "--find-links", wheels_dir],
+                    capture_output=True, text=True
+                )
+                if result.returncode != 0:
+                    log_message(log_file, f"pip wheel failed:\n{result.stdout[-4000:]}{result.stderr[-4000:]}")
+                    raise RuntimeError(f"pip wheel failed for {app_type} with exit code {result.returncode}")
+
+        with open(os.path.join(wheels_dir, ".complete"), "w") as f:
+            f.write(datetime.datetime.now().isoformat())
+        status.update({
+            "status": "ready",
+            "built_at": datetime.datetime.now().isoformat(),
+            "wheels": len([f for f in os.listdir(wheels_dir) if f.endswith(".whl")])
+        })
+        print(f"Prefetched {status['wheels']} wheels for {model_name} into {wheels_dir}")
+    except Exception as e:
+        log_message(log_file, f"Wheelhouse prefetch error: {e}")
+        print(f"Wheelhouse prefetch failed for {model_name}, deployments will use the package index: {e}")
+
+    descriptor["wheelhouse"] = status
+    descriptor_path = os.path.join(release_folder, "descriptor.json")
+    if os.path.exists(descriptor_path):
+        with open(descriptor_path, "r") as f:
+            descriptor_data = json.load(f)
+        descriptor_data["wheelhouse"] = status
+        with open(descriptor_path, "w") as f:
+            json.dump(descriptor_data, f, indent=4)
+
+    return wheels_dir if status["status"] == "ready" else None
+
+def prefetch_and_deploy(model_name, zip_path, descriptor):
+    """
+    Background upload pipeline: prefetch wheels, then deploy both apps.
+    """
+    prefetch_wheelhouse(model_name, descriptor)
+    deploy_in_background(model_name, zip_path, descriptor)
+
+#############################################
+# Load Balancing                            #
+#############################################
+# Policies pick one instance out of a list of routable candidates using the
+# per-instance counters kept on the registry records:
+#   "in_flight": int         # proxied requests currently being served
+#   "ewma_latency": float    # smoothed request latency in seconds
+# The policy is LOAD_BALANCER_POLICY, overridable per model with
+# "load_balancer": {"policy": str} in the descriptor.
+
+LOAD_BALANCER_POLICY = os.environ.get("LOAD_BALANCER_POLICY", "least_outstanding")
+EWMA_ALPHA = float(os.environ.get("EWMA_ALPHA", 0.3))
+
+registry_lock = threading.Lock()
+
+def acquire_instance(instance):
+    """
+    Marks one more in-flight request on an instance.
+
+    Returns:
+        float: Start timestamp to hand back to release_instance.
+    """
+    with registry_lock:
+        instance["in_flight"] = instance.get("in_flight", 0) + 1
+        instance["last_request_at"] = time.time()
+    record_arrival(instance.get("model_name"))
+    return time.perf_counter()
+
+def release_instance(instance, started=None, success=True):
+    """
+    Marks an in-flight request on an instance as finished and folds its
+    latency into the instance's EWMA. A failed request counts as a
+    PROXY_CONNECT_TIMEOUT-long sample so fast failures don't attract traffic.
+    """
+    with registry_lock:
+        instance["in_flight"] = max(instance.get("in_flight", 0) - 1, 0)
+        instance["last_request_at"] = time.time()
+        if started is not None:
+            latency = time.perf_counter() - started if success else max(time.perf_counter() - started, PROXY_CONNECT_TIMEOUT)
+            previous = instance.get("ewma_latency")
+            instance["ewma_latency"] = latency if previous is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * previous
+    if started is not None:
+        record_latency(instance.get("model_name"), latency)
+    record_proxy_result(instance, success)
+
+def pick_random(candidates):
+    return random.choice(candidates)
+
+def pick_least_outstanding(candidates):
+    fewest = min(i.get("in_flight", 0) for i in candidates)
+    return random.choice([i for i in candidates if i.get("in_flight", 0) == fewest])
+
+def pick_power_of_two(candidates):
+    if len(candidates) < 2:
+        return candidates[0]
+    first, second = random.sample(candidates, 2)
+    return first if first.get("in_flight", 0) <= second.get("in_flight", 0) else second
+
+def pick_ewma_latency(candidates):
+    # Expected wait ~ latency * queue depth; instances without samples are
+    # assumed to be as fast as the pool average, so a new instance gets its
+    # share of traffic without every request herding onto it
+    sampled = [i["ewma_latency"] for i in candidates if i.get("ewma_latency") is not None]
+    seed = sum(sampled) / len(sampled) if sampled else 1.0
+    def score(instance):
+        latency = instance.get("ewma_latency")
+        return (seed if latency is None else latency) * (instance.get("in_flight", 0) + 1)
+    best = min(score(i) for i in candidates)
+    return random.choice([i for i in candidates if score(i) == best])
+
+LOAD_BALANCERS = {
+    "random": pick_random,
+    "least_outstanding": pick_least_outstanding,
+    "power_of_two": pick_power_of_two,
+    "ewma_latency": pick_ewma_latency
+}
+
+def choose_instance(model_name, candidates):
+    """
+    Picks one of the candidate instances with the model's balancing policy.
+
+    Args:
+        model_name (str): The name of the model.
+        candidates (list): Routable instance records.
+
+    Returns:
+        dict: The chosen instance, or None if there are no candidates.
+    """
+    if not candidates:
+        return None
+    descriptor = app_servers.get(model_name, {}).get("model_info", {}).get("descriptor") or {}
+    policy = (descriptor.get("load_balancer") or {}).get("policy", LOAD_BALANCER_POLICY)
+    # Unknown policy names fall back to least outstanding requests
+    return LOAD_BALANCERS.get(policy, pick_least_outstanding)(candidates)
+
+#############################################
+# Warm Pool                                 #
+#############################################
+# Keeps inference_app instances booted ahead of demand. Configured per model
+# in the release descriptor:
+#   "warm_pool": {"min_idle": int, "max_instances": int, "busy_in_flight": int}
+# The pool is off unless min_idle is set above 0. An instance counts as idle
+# while it serves fewer than busy_in_flight proxied requests, so a single
+# request does not trigger another deployment. Instances the pool started are
+# drained again once they have been unused for WARM_POOL_IDLE_SECONDS and the
+# remaining idle instances still cover min_idle.
+
+WARM_POOL_INTERVAL = float(os.environ.get("WARM_POOL_INTERVAL", 5))
+WARM_POOL_DEFAULTS = {
+    "min_idle": 0,
+    "max_instances": 4,
+    "busy_in_flight": int(os.environ.get("WARM_POOL_BUSY_IN_FLIGHT", 4)),
+}
+WARM_POOL_IDLE_SECONDS = float(os.environ.get("WARM_POOL_IDLE_SECONDS", 300))
+# How long a proxied request waits for an in-progress deployment
+PROXY_DEPLOY_WAIT_SECONDS = float(os.environ.get("PROXY_DEPLOY_WAIT_SECONDS", 600))
+
+warm_pool_wakeup = threading.Event()
+warm_pool_pending = set()  # models with a pool deployment in flight
+warm_pool_thread = None
+
+def is_instance_alive(instance):
+    """
+    Returns True if the instance's process has been started and not exited.
+    """
+    proc = instance.get("process")
+    return proc is not None and proc.poll() is None
+
+def is_instance_routable(instance):
+    """
+    Returns True if the instance can receive proxied traffic.
+    """
+    return not instance["deploying"] and instance["status"] == "running" and is_instance_alive(instance)
+
+def is_inference_deploying(model_name):
+    """
+    Returns True if an inference_app of the model is being deployed or is
+    starting up and will become routable without further action.
+    """
+    if deployment_locks.get(f"{model_name}_inference_app"):
+        return True
+    return any(i["deploying"] for i in app_servers.get(model_name, {}).get("inference_apps", []))
+
+def wait_for_routable_instance(model_name, timeout):
+    """
+    Waits for an in-progress inference_app deployment of a model to become
+    routable.
+
+    Returns:
+        dict: The instance record, or None on timeout.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for instance in app_servers.get(model_name, {}).get("inference_apps", []):
+            if is_instance_routable(instance):
+                return instance
+        time.sleep(0.2)
+    return None
+
+def select_inference_instance(model_name):
+    """
+    Picks a routable inference_app instance for a proxied request with the
+    model's load balancing policy, and wakes the pool manager when the last
+    idle one is taken. Shared by the Flask proxy route and the async gateway.
+
+    Returns:
+        dict: The instance record, or None if nothing is routable.
+    """
+    if model_name not in app_servers:
+        return None
+    available_instances = [
+        instance
+        for instance in app_servers[model_name]["inference_apps"]
+        if is_instance_routable(instance)
+    ]
+    if not available_instances:
+        return None
+    # Outlier-ejected instances only get traffic when every instance is ejected
+    now = time.time()
+    available_instances = [i for i in available_instances if i.get("ejected_until", 0) <= now] or available_instances
+    descriptor = app_servers[model_name].get("model_info", {}).get("descriptor") or {}
+    config = warm_pool_config(descriptor)
+    if config:
+        idle_instances = [i for i in available_instances if i.get("in_flight", 0) + 1 < config["busy_in_flight"]]
+        if len(idle_instances) <= 1:
+            # This request may leave no idle instance, so the pool is below min_idle
+            warm_pool_wakeup.set()
+    return choose_instance(model_name, available_instances)
+
+def load_release(model_name):
+    """
+    Reads a model's release descriptor and archive path from disk.
+
+    Returns:
+        tuple: (descriptor, zip_path), or (None, None) if the model is not packaged.
+    """
+    descriptor_path = os.path.join(UPLOAD_FOLDER, model_name, "release/descriptor.json")
+    zip_path = os.path.join(UPLOAD_FOLDER, model_name, "release", f"{model_name}.zip")
+    if not os.path.exists(descriptor_path) or not os.path.exists(zip_path):
+        return None, None
+    with open(descriptor_path, 'r') as f:
+        return json.load(f), zip_path
+
+def warm_pool_config(descriptor):
+    """
+    Returns the warm pool settings of a model, or None when pooling is off.
+    """
+    config = descriptor.get("warm_pool")
+    if not config:
+        return None
+    min_idle = int(config.get("min_idle", 0))
+    max_instances = int(config.get("max_instances", WARM_POOL_DEFAULTS["max_instances"]))
+    if min_idle <= 0 or max_instances <= 0:
+        return None
+    busy_in_flight = max(1, int(config.get("busy_in_flight", WARM_POOL_DEFAULTS["busy_in_flight"])))
+    return {"min_idle": min(min_idle, max_instances), "max_instances": max_instances, "busy_in_flight": busy_in_flight}
+
+def warm_pool_form_config(form):
+    """
+    Reads the warm pool fields of the upload form.
+
+    Returns:
+        dict: The "warm_pool" descriptor section.
+
+    Raises:
+        ValueError: If a field is not a non-negative integer.
+    """
+    config = {}
+    for field in ("min_idle", "max_instances", "busy_in_flight"):
+        value = (form.get(field) or "").strip()
+        if not value:
+            config[field] = WARM_POOL_DEFAULTS[field]
+            continue
+        if not value.isdigit():
+            raise ValueError(f"{field} must be a non-negative integer, got '{value}'")
+        config[field] = int(value)
+    return config
+
+def reconcile_warm_pool(model_name, descriptor, zip_path):
+    """
+    Starts a background inference_app deployment if the model has fewer idle
+    instances than min_idle and is below max_instances, or drains one unused
+    pool instance when there are more idle instances than min_idle. Instances
+    whose process has exited are marked as such so they are no longer counted.
+
+    Returns:
+        bool: True if a deployment was started.
+    """
+    config = warm_pool_config(descriptor)
+    if not config or is_model_parked(model_name):
+        return False
+    # An explicitly requested replica count caps the pool
+    requested = requested_replicas(model_name, "inference_app")
+    if requested is not None:
+        config["max_instances"] = min(config["max_instances"], requested)
+
+    instances = app_servers.get(model_name, {}).get("inference_apps", [])
+    for instance in instances:
+        if instance["status"] == "running" and instance.get("process") and not is_instance_alive(instance):
+            instance["status"] = "exited"
+            print(f"Inference instance {instance['id']} of {model_name} exited")
+
+    live = [i for i in instances if is_instance_routable(i)]
+    deploying = [i for i in instances if i["deploying"]]
+    idle = [i for i in live if i.get("in_flight", 0) < config["busy_in_flight"]]
+
+    if len(idle) > config["min_idle"] and (requested is None or len(live) > requested):
+        now = time.time()
+        unused = [
+            i for i in idle
+            if i.get("warm_pool") and i.get("in_flight", 0) == 0
+            and now - i.get("last_request_at", now) >= WARM_POOL_IDLE_SECONDS
+        ]
+        if unused:
+            instance = min(unused, key=lambda i: i.get("last_request_at", 0))
+            print(f"Warm pool for {model_name}: {len(idle)} idle > min_idle {config['min_idle']}, draining {instance['id']}")
+            drain_instance(instance)
+        return False
+    if len(idle) + len(deploying) >= config["min_idle"]:
+        return False
+    if len(live) + len(deploying) >= config["max_instances"]:
+        return False
+    with registry_lock:
+        if model_name in warm_pool_pending or deployment_locks.get(f"{model_name}_inference_app"):
+            return False
+        warm_pool_pending.add(model_name)
+
+    def replenish():
+        try:
+            instance = deploy_instance(model_name, zip_path, descriptor, "inference_app")
+            # Only instances the pool started are drained by it again
+            instance["warm_pool"] = True
+        except Exception as e:
+            print(f"Warm pool deployment for {model_name} failed: {e}")
+        finally:
+            with registry_lock:
+                warm_pool_pending.discard(model_name)
+
+    print(f"Warm pool for {model_name}: {len(idle)} idle / {len(live)} live, deploying another inference_app")
+    threading.Thread(target=replenish, daemon=True).start()
+    return True
+
+def warm_pool_loop():
+    """
+    Periodically reconciles the warm pool of every packaged model.
+    Woken early by warm_pool_wakeup when instances are consumed.
+    """
+    while True:
+        try:
+            for model_name in os.listdir(UPLOAD_FOLDER):
+                release_folder = os.path.join(UPLOAD_FOLDER, model_name, "release")
+                descriptor_path = os.path.join(release_folder, "descriptor.json")
+                zip_path = os.path.join(release_folder, f"{model_name}.zip")
+                if not os.path.exists(descriptor_path) or not os.path.exists(zip_path):
+                    continue
+                with open(descriptor_path, "r") as f:
+                    descriptor = json.load(f)
+                if autoscale_config(descriptor):
+                    continue  # capacity is managed by the autoscaler
+                reconcile_warm_pool(model_name, descriptor, zip_path)
+        except Exception as e:
+            print(f"Warm pool error: {e}")
+        warm_pool_wakeup.wait(WARM_POOL_INTERVAL)
+        warm_pool_wakeup.clear()
+
+def start_warm_pool():
+    """
+    Starts the warm pool manager thread once per process.
+    """
+    global warm_pool_thread
+    if warm_pool_thread is None:
+        warm_pool_thread = threading.Thread(target=warm_pool_loop, daemon=True)
+        warm_pool_thread.start()
+
+#############################################
+# Autoscaler                                #
+#############################################
+# acquire_instance/release_instance record every proxied request per model
+# (arrival times and latencies over the last AUTOSCALE_WINDOW seconds). For
+# models with an "autoscale" block in their descriptor, e.g.
+#   "autoscale": {"min_instances": 1, "max_instances": 8,
+#                 "target_in_flight": 4, "target_p95_ms": 500}
+# the autoscaler thread sizes the inference_app pool to
+# ceil(concurrency / target_in_flight), where concurrency is the larger of
+# the current in-flight count and rate * mean latency (Little's law). A p95
+# above target_p95_ms adds one instance. Scale-ups and scale-downs have
+# separate cooldowns; scale-downs go one instance at a time and drain it.
+# Autoscaled models are skipped by the warm pool.
+
+AUTOSCALE_ENABLED = os.environ.get("AUTOSCALE", "1") == "1"
+AUTOSCALE_INTERVAL = float(os.environ.get("AUTOSCALE_INTERVAL", 5))
+AUTOSCALE_WINDOW = float(os.environ.get("AUTOSCALE_WINDOW", 30))
+AUTOSCALE_DEFAULTS = {
+    "min_instances": 1,
+    "max_instances": 4,
+    "target_in_flight": 4,
+    "target_p95_ms": None,
+    "scale_up_cooldown": 15,
+    "scale_down_cooldown": 60,
+}
+TRAFFIC_MAX_SAMPLES = 100000
+
+model_traffic = {}  # model_name -> {"arrivals": deque, "latencies": deque}
+autoscale_state = {}  # model_name -> {"last_up": float, "last_down": float}
+autoscaler_thread = None
+
+def _model_traffic(model_name):
+    from collections import deque
+    traffic = model_traffic.get(model_name)
+    if traffic is None:
+        with registry_lock:
+            traffic = model_traffic.setdefault(model_name, {
+                "arrivals": deque(maxlen=TRAFFIC_MAX_SAMPLES),
+                "latencies": deque(maxlen=TRAFFIC_MAX_SAMPLES),
+                # Guards both deques: request threads append and trim while
+                # the autoscaler and status requests copy them
+                "lock": threading.Lock(),
+            })
+    return traffic
+
+def _trim(samples, horizon):
+    while samples and samples[0][0] < horizon:
+        samples.popleft()
+
+def record_arrival(model_name):
+    """
+    Records a proxied request to a model.
+    """
+    if model_name is None:
+        return
+    now = time.time()
+    traffic = _model_traffic(model_name)
+    with traffic["lock"]:
+        traffic["arrivals"].append((now, None))
+        _trim(traffic["arrivals"], now - AUTOSCALE_WINDOW)
+
+def record_latency(model_name, latency):
+    """
+    Records the latency (seconds) of a finished proxied request to a model.
+    """
+    if model_name is None:
+        return
+    now = time.time()
+    traffic = _model_traffic(model_name)
+    with traffic["lock"]:
+        traffic["latencies"].append((now, latency))
+        _trim(traffic["latencies"], now - AUTOSCALE_WINDOW)
+
+def traffic_snapshot(model_name, window=None):
+    """
+    Summarizes a model's proxied traffic over the last `window` seconds.
+
+    Returns:
+        dict: rps, mean_ms, p95_ms (None without samples) and in_flight.
+    """
+    window = window or AUTOSCALE_WINDOW
+    horizon = time.time() - window
+    traffic = _model_traffic(model_name)
+    with traffic["lock"]:
+        arrivals = list(traffic["arrivals"])
+        latencies = list(traffic["latencies"])
+    arrivals = [t for t, _ in arrivals if t >= horizon]
+    latencies = sorted(l for t, l in latencies if t >= horizon)
+    in_flight = sum(
+        i.get("in_flight", 0) for i in app_servers.get(model_name, {}).get("inference_apps", [])
+    )
+    snapshot = {"rps": round(len(arrivals) / window, 3), "mean_ms": None, "p95_ms": None, "in_flight": in_flight}
+    if latencies:
+        snapshot["mean_ms"] = round(sum(latencies) / len(latencies) * 1000, 1)
+        snapshot["p95_ms"] = round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 1)
+    return snapshot
+
+def autoscale_config(descriptor):
+    """
+    Returns the autoscaling bounds of a model, or None when it is not autoscaled.
+    """
+    config = descriptor.get("autoscale")
+    if not config or not AUTOSCALE_ENABLED:
+        return None
+    merged = dict(AUTOSCALE_DEFAULTS, **config)
+    merged["max_instances"] = max(int(merged["max_instances"]), 1)
+    merged["min_instances"] = min(max(int(merged["min_instances"]), 0), merged["max_instances"])
+    return merged
+
+def desired_replicas(config, snapshot, current):
+    """
+    Computes the inference_app replica count for a traffic snapshot,
+    before cooldowns.
+    """
+    import math
+    concurrency = snapshot["in_flight"]
+    if snapshot["mean_ms"] is not None:
+        concurrency = max(concurrency, snapshot["rps"] * snapshot["mean_ms"] / 1000)
+    desired = math.ceil(concurrency / max(float(config["target_in_flight"]), 0.1))
+    target_p95 = config.get("target_p95_ms")
+    if target_p95 and snapshot["p95_ms"] is not None and snapshot["p95_ms"] > target_p95:
+        desired = max(desired, current + 1)
+    return min(max(desired, config["min_instances"]), config["max_instances"])
+
+def autoscale_model(model_name, descriptor, zip_path):
+    """
+    Evaluates one model and starts a scale-up or a one-instance scale-down
+    in the background when it is due.
+
+    Returns:
+        int: The replica count being scaled to, or None if nothing changed.
+    """
+    config = autoscale_config(descriptor)
+    if not config or deployment_locks.get(f"{model_name}_inference_app") or is_model_parked(model_name):
+        return None
+
+    now = time.time()
+    state = autoscale_state.setdefault(model_name, {"last_up": 0.0, "last_down": 0.0})
+    current = len(live_instances(model_name, "inference_app"))
+    snapshot = traffic_snapshot(model_name)
+    desired = desired_replicas(config, snapshot, current)
+
+    if desired > current:
+        if now - state["last_up"] < config["scale_up_cooldown"]:
+            return None
+        state["last_up"] = now
+    elif desired < current:
+        last_change = max(state["last_up"], state["last_down"])
+        if now - last_change < config["scale_down_cooldown"]:
+            return None
+        desired = current - 1
+        state["last_down"] = now
+    else:
+        return None
+
+    print(f"Autoscaler: {model_name} {current} -> {desired} inference_apps ({snapshot})")
+
+    def scale():
+        try:
+            scale_instances(model_name, zip_path, descriptor, "inference_app", desired)
+        except Exception as e:
+            print(f"Autoscaler error for {model_name}: {e}")
+
+    threading.Thread(target=scale, daemon=True).start()
+    return desired
+
+def autoscaler_loop():
+    """
+    Periodically evaluates every packaged model that has autoscaling enabled.
+    """
+    while True:
+        try:
+            for model_name in os.listdir(UPLOAD_FOLDER):
+                descriptor, zip_path = load_release(model_name)
+                if descriptor is not None:
+                    autoscale_model(model_name, descriptor, zip_path)
+        except Exception as e:
+            print(f"Autoscaler error: {e}")
+        time.sleep(AUTOSCALE_INTERVAL)
+
+def start_autoscaler():
+    """
+    Starts the autoscaler thread once per process.
+    """
+    global autoscaler_thread
+    if autoscaler_thread is None and AUTOSCALE_ENABLED:
+        autoscaler_thread = threading.Thread(target=autoscaler_loop, daemon=True)
+        autoscaler_thread.start()
+
+#############################################
+# Scale To Zero                             #
+#############################################
+# Inference instances idle for longer than the model's idle TTL are
+# suspended: their process is stopped, but the instance record, directory and
+# cached venv are kept. The next proxied request to a model whose inference
+# instances are all suspended resumes the most recently used one in place,
+# which costs one process start instead of a deployment. The TTL is
+# IDLE_TTL (0 disables), overridable per model with
+# "scale_to_zero": {"idle_ttl": seconds} in the descriptor. Web apps are not
+# proxied, so their idleness is unknown and they are left running.
+
+IDLE_TTL = float(os.environ.get("IDLE_TTL", 0))
+IDLE_REAP_INTERVAL = float(os.environ.get("IDLE_REAP_INTERVAL", 10))
+SUSPEND_STOP_TIMEOUT = 10
+
+idle_reaper_thread = None
+
+def idle_ttl(descriptor):
+    """
+    Returns the idle TTL of a model in seconds (0 when it never scales to zero).
+    """
+    return float((descriptor.get("scale_to_zero") or {}).get("idle_ttl", IDLE_TTL))
+
+def is_model_parked(model_name):
+    """
+    Returns True if the model's inference instances are all suspended, in
+    which case pool managers leave it alone until traffic resumes it.
+    """
+    instances = app_servers.get(model_name, {}).get("inference_apps", [])
+    return any(i["status"] == "suspended" for i in instances) and not live_instances(model_name, "inference_app")
+
+def suspend_instance(instance):
+    """
+    Stops an idle instance's process, keeping it resumable.
+    """
+    instance["status"] = "suspended"
+    close_proxy_session(instance)
+    proc = instance.get("process")
+    if proc and proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=SUSPEND_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    if instance.get("app_dir"):
+        log_message(os.path.join(instance["app_dir"], "app.log"), "Suspended after idle TTL")
+
+def reap_idle_instances(model_name, descriptor):
+    """
+    Suspends the model's inference instances that have been idle longer
+    than its idle TTL.
+
+    Returns:
+        int: Number of suspended instances.
+    """
+    ttl = idle_ttl(descriptor)
+    if ttl <= 0 or deployment_locks.get(f"{model_name}_inference_app"):
+        return 0
+    now = time.time()
+    reaped = 0
+    for instance in list(app_servers.get(model_name, {}).get("inference_apps", [])):
+        if not is_instance_routable(instance) or not instance.get("launch"):
+            continue
+        with registry_lock:
+            if instance.get("in_flight", 0) > 0 or now - instance.get("last_request_at", now) < ttl:
+                continue
+            instance["status"] = "suspended"  # out of routing before the lock is released
+        suspend_instance(instance)
+        reaped += 1
+        print(f"Suspended idle inference instance {instance['id']} of {model_name}")
+    return reaped
+
+def resume_model(model_name):
+    """
+    Restarts the most recently used suspended inference instance of a model
+    in its existing directory and venv.
+
+    Returns:
+        dict: The resumed instance, or None if there was nothing to resume
+            (or its venv has been evicted and a fresh deployment is needed).
+    """
+    lock_key = f"{model_name}_inference_app"
+    suspended = [i for i in app_servers.get(model_name, {}).get("inference_apps", []) if i["status"] == "suspended"]
+    if not suspended:
+        return None
+    with registry_lock:
+        if deployment_locks.get(lock_key):
+            return None
+        deployment_locks[lock_key] = True
+
+    instance = max(suspended, key=lambda i: i.get("last_request_at", 0))
+    log_file = os.path.join(instance["app_dir"], "app.log")
+    try:
+        if not os.path.exists(instance["launch"]["python"]):
+            instance["status"] = "stopped"
+            return None
+        started = time.time()
+        instance["deploying"] = True
+        instance["status"] = "initializing"
+        
+        # Keep the previous port unless something else took it meanwhile
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            try:
+                s.bind(("", instance["port"]))
+            except OSError:
+                s.bind(("", 0))
+                instance["port"] = s.getsockname()[1]
+                instance["url"] = f"http://localhost:{instance['port']}"
+        
+        proc = start_instance_process(instance, log_file)
+        log_message(log_file, f"Resumed with PID {proc.pid} in {round(time.time() - started, 2)}s")
+        print(f"Resumed inference instance {instance['id']} of {model_name}")
+        start_readiness_probe(instance, log_file)
+        return instance
+    except Exception as e:
+        log_message(log_file, f"Resume error: {str(e)}")
+        instance["status"] = "suspended"
+        instance["deploying"] = False
+        return None
+    finally:
+        deployment_locks[lock_key] = False
+
+def idle_reaper_loop():
+    """
+    Periodically suspends idle inference instances of every packaged model.
+    """
+    while True:
+        try:
+            for model_name in list(app_servers):
+                descriptor, _ = load_release(model_name)
+                if descriptor is not None:
+                    reap_idle_instances(model_name, descriptor)
+        except Exception as e:
+            print(f"Idle reaper error: {e}")
+        time.sleep(IDLE_REAP_INTERVAL)
+
+def start_idle_reaper():
+    """
+    Starts the idle reaper thread once per process.
+    """
+    global idle_reaper_thread
+    if idle_reaper_thread is None:
+        idle_reaper_thread = threading.Thread(target=idle_reaper_loop, daemon=True)
+        idle_reaper_thread.start()
+
+#############################################
+# Supervisor                                #
+#############################################
+# Keeps the routable set healthy:
+#  - a proxied request failing (connection error, timeout or one of
+#    INSTANCE_FAILURE_STATUSES) on an instance whose process has exited
+#    marks it "exited" right away;
+#  - OUTLIER_CONSECUTIVE_ERRORS failed requests in a row eject an instance
+#    from load balancing for OUTLIER_EJECTION_SECONDS, doubled on every
+#    repeated ejection up to OUTLIER_MAX_EJECTION_SECONDS;
+#  - every SUPERVISOR_INTERVAL the supervisor polls the process and the
+#    readiness path of all running instances, SUPERVISOR_PROBE_WORKERS at a
+#    time; HEALTH_FAILURE_THRESHOLD failed checks in a row stop an instance
+#    as "unhealthy".
+# Instances that were ready once and then exited or turned unhealthy are
+# replaced by a new deployment of the same app type (left to the autoscaler
+# for autoscaled inference apps). Instances that never
+# became ready ("failed") are not, so a crashing release does not loop.
+
+SUPERVISOR_INTERVAL = float(os.environ.get("SUPERVISOR_INTERVAL", 5))
+HEALTH_FAILURE_THRESHOLD = int(os.environ.get("HEALTH_FAILURE_THRESHOLD", 3))
+SUPERVISOR_PROBE_WORKERS = int(os.environ.get("SUPERVISOR_PROBE_WORKERS", 16))
+# Upstream statuses that count against an instance, like connection errors
+# and timeouts. Other 5xx are usually an app error on one bad input and say
+# nothing about the instance's health.
+INSTANCE_FAILURE_STATUSES = (502, 503, 504)
+OUTLIER_CONSECUTIVE_ERRORS = int(os.environ.get("OUTLIER_CONSECUTIVE_ERRORS", 5))
+OUTLIER_EJECTION_SECONDS = float(os.environ.get("OUTLIER_EJECTION_SECONDS", 10))
+OUTLIER_MAX_EJECTION_SECONDS = 300
+
+supervisor_thread = None
+
+def mark_instance_exited(instance):
+    """
+    Takes an instance whose process has exited out of routing.
+    """
+    instance["status"] = "exited"
+    close_proxy_session(instance)
+    code = instance["process"].poll() if instance.get("process") else None
+    print(f"Instance {instance['id']} of {instance.get('model_name')} exited with code {code}")
+    if instance.get("app_dir"):
+        log_message(os.path.join(instance["app_dir"], "app.log"), f"Process exited with code {code}")
+
+def record_proxy_result(instance, success):
+    """
+    Updates the outlier detection state of an instance after a proxied
+    request, ejecting it after OUTLIER_CONSECUTIVE_ERRORS failures in a row.
+    A failure is a connection error, a timeout or one of
+    INSTANCE_FAILURE_STATUSES.
+    """
+    if success:
+        if instance.get("consecutive_errors"):
+            instance["consecutive_errors"] = 0
+        return
+    if instance["status"] == "running" and instance.get("process") and not is_instance_alive(instance):
+        mark_instance_exited(instance)
+        return
+    with registry_lock:
+        instance["consecutive_errors"] = instance.get("consecutive_errors", 0) + 1
+        if instance["consecutive_errors"] < OUTLIER_CONSECUTIVE_ERRORS:
+            return
+        instance["consecutive_errors"] = 0
+        instance["ejections"] = instance.get("ejections", 0) + 1
+        duration = min(OUTLIER_EJECTION_SECONDS * 2 ** (instance["ejections"] - 1), OUTLIER_MAX_EJECTION_SECONDS)
+        instance["ejected_until"] = time.time() + duration
+    print(f"Ejected instance {instance['id']} of {instance.get('model_name')} for {duration}s after {OUTLIER_CONSECUTIVE_ERRORS} consecutive errors")
+
+def supervise_instance(instance):
+    """
+    Checks one running instance's process and health endpoint.
+
+    Returns:
+        bool: True if the instance is down and should be replaced.
+    """
+    if not is_instance_alive(instance):
+        mark_instance_exited(instance)
+        return True
+    if check_instance_ready(instance, instance["launch"].get("readiness_path", "/")):
+        instance["health_failures"] = 0
+        if instance.get("ejected_until") and instance["ejected_until"] <= time.time():
+            instance["ejections"] = 0  # healthy after serving out its ejection
+            instance["ejected_until"] = 0
+        return False
+    instance["health_failures"] = instance.get("health_failures", 0) + 1
+    if instance["health_failures"] < HEALTH_FAILURE_THRESHOLD:
+        return False
+    terminate_instance(instance)
+    instance["status"] = "unhealthy"
+    print(f"Stopped unhealthy instance {instance['id']} of {instance.get('model_name')} after {HEALTH_FAILURE_THRESHOLD} failed health checks")
+    if instance.get("app_dir"):
+        log_message(os.path.join(instance["app_dir"], "app.log"), "Stopped after failed health checks")
+    return True
+
+def supervised_instances():
+    """
+    Returns the running instances of every model that the supervisor
+    health-checks.
+    """
+    return [
+        instance
+        for model_data in list(app_servers.values())
+        for app_type in ("web_app", "inference_app")
+        for instance in list(model_data.get(f"{app_type}s", []))
+        if instance["status"] == "running" and not instance["deploying"] and instance.get("launch")
+    ]
+
+def supervise_model(model_name):
+    """
+    Deploys replacements for the instances of a model that went down since
+    they were last supervised.
+
+    Returns:
+        dict: Number of replacements started per app type.
+    """
+    replacements = {}
+    for app_type in ("web_app", "inference_app"):
+        for instance in list(app_servers.get(model_name, {}).get(f"{app_type}s", [])):
+            if instance["status"] in ("exited", "unhealthy") and instance.get("ready_at") and not instance.get("replaced"):
+                instance["replaced"] = True
+                replacements[app_type] = replacements.get(app_type, 0) + 1
+
+    if not replacements:
+        return replacements
+    descriptor, zip_path = load_release(model_name)
+    if descriptor is None:
+        return {}
+    if autoscale_config(descriptor):
+        replacements.pop("inference_app", None)  # the autoscaler owns that count
+    for app_type, count in replacements.items():
+        def replace(app_type=app_type, count=count):
+            for _ in range(10):
+                try:
+                    live = len(live_instances(model_name, app_type))
+                    replicas = live + count
+                    # Never undo a scale-down (or scale to zero) done through /scale
+                    requested = requested_replicas(model_name, app_type)
+                    if requested is not None:
+                        replicas = min(replicas, requested)
+                    if replicas <= live:
+                        return
+                    scale_instances(model_name, zip_path, descriptor, app_type, replicas)
+                    return
+                except RuntimeError:
+                    time.sleep(SUPERVISOR_INTERVAL)  # another deployment holds the lock
+                except Exception as e:
+                    print(f"Supervisor failed to replace {app_type} of {model_name}: {e}")
+                    return
+        print(f"Supervisor: replacing {count} {app_type} instance(s) of {model_name}")
+        threading.Thread(target=replace, daemon=True).start()
+    return replacements
+
+def supervisor_loop():
+    """
+    Periodically supervises the instances of every model in the registry and
+    evicts shared weights no instance uses any more.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=SUPERVISOR_PROBE_WORKERS, thread_name_prefix="supervisor") as pool:
+        while True:
+            try:
+                # Probed concurrently, so a hanging instance does not hold up
+                # the health checks of all the others
+                list(pool.map(supervise_instance, supervised_instances()))
+                for model_name in list(app_servers):
+                    supervise_model(model_name)
+                evict_shared_weights()
+            except Exception as e:
+                print(f"Supervisor error: {e}")
+            time.sleep(SUPERVISOR_INTERVAL)
+
+def start_supervisor():
+    """
+    Starts the supervisor thread once per process.
+    """
+    global supervisor_thread
+    if supervisor_thread is None:
+        supervisor_thread = threading.Thread(target=supervisor_loop, daemon=True)
+        supervisor_thread.start()
+
+#############################################
+# Proxy Engine                              #
+#############################################
+# One keep-alive requests.Session per backend instance; request and response
+# bodies are streamed through in PROXY_CHUNK_SIZE chunks.
+
+PROXY_POOL_SIZE = int(os.environ.get("PROXY_POOL_SIZE", 32))
+PROXY_CONNECT_TIMEOUT = float(os.environ.get("PROXY_CONNECT_TIMEOUT", 5))
+PROXY_READ_TIMEOUT = float(os.environ.get("PROXY_READ_TIMEOUT", 300))
+PROXY_CHUNK_SIZE = int(os.environ.get("PROXY_CHUNK_SIZE", 64 * 1024))
+
+# Connection-level headers that must not be forwarded (RFC 7230 section 6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade", "host"
+}
+
+proxy_sessions = {}
+proxy_sessions_lock = threading.Lock()
+
+def get_proxy_session(instance):
+    """
+    Returns the pooled HTTP session for an instance, creating it on first use.
+    """
+    import http.cookiejar
+    from requests.adapters import HTTPAdapter
+
+    with proxy_sessions_lock:
+        session = proxy_sessions.get(instance["id"])
+        if session is None:
+            session = requests.Session()
+            # The session is shared by all clients: never persist cookies or
+            # consult proxy/netrc settings from the environment
+            session.trust_env = False
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PROXY_POOL_SIZE, max_retries=0)
+            session.mount("http://", adapter)
+            proxy_sessions[instance["id"]] = session
+        return session
+
+def close_proxy_session(instance):
+    """
+    Closes and forgets the pooled session of an instance.
+    """
+    with proxy_sessions_lock:
+        session = proxy_sessions.pop(instance["id"], None)
+    if session is not None:
+        session.close()
+
+class _RequestBodyStream:
     """
-    Deploy both web app and inference app as separate instances simultaneously.
+    File-like view over the incoming request body with a known length, so the
+    upstream request keeps Content-Length while being sent chunk by chunk.
     """
-    results = {"web_app": None, "inference_app": None}
-    errors = []
-    
-    def deploy_component(component_type):
-        try:
-            results[component_type] = deploy_instance(model_name, zip_path, descriptor, component_type)
-        except Exception as e:
-            error_msg = f"Error deploying {component_type}: {str(e)}"
-            errors.append(error_msg)
-    
-    # Create threads for parallel deployment
-    web_thread = threading.Thread(target=deploy_component, args=("web_app",))
-    inf_thread = threading.Thread(target=deploy_component, args=("inference_app",))
-    
-    # Start threads
-    inf_thread.start()
-    web_thread.start()
-    
-    # Wait for completion
-    inf_thread.join()
-    web_thread.join()
-    
-    # Check for errors
-    if errors:
-        raise Exception("; ".join(errors))
-    
-    # Return results
-    return {
-        "web_app": {
-            "instance_id": results["web_app"]["id"],
-            "port": results["web_app"]["port"]
-        },
-        "inference_app": {
-            "instance_id": results["inference_app"]["id"],
-            "port": results["inference_app"]["port"]
-        }
-    }
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.length = length
 
-#############################################
-# Packaging Function                       #
-#############################################
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        return self.stream.read(PROXY_CHUNK_SIZE if size is None or size < 0 else size)
+
+def _chunked_body(stream):
+    while True:
+        chunk = stream.read(PROXY_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
 
-def package_model(model_name, web_app_zip, inference_app_zip):
+def forward_request(instance, subpath, on_complete=None):
     """
-    Packages web app (frontend) and inference app (API backend) into a model release.
-    Also creates a descriptor.json file containing model metadata.
+    Forwards the current Flask request to an instance and streams the reply.
 
     Args:
-        model_name (str): The name of the model to be packaged.
-        web_app_zip (FileStorage): The uploaded zip file for the web application.
-        inference_app_zip (FileStorage): The uploaded zip file for the inference application.
+        instance (dict): Target instance record.
+        subpath (str): Path to request on the instance.
+        on_complete (callable, optional): Called exactly once when the reply
+            is done (body relayed, or response closed without a body as for
+            HEAD or 204/304), with False if the upstream request failed or
+            answered with one of INSTANCE_FAILURE_STATUSES, True otherwise.
 
     Returns:
-        tuple: A tuple containing:
-            - descriptor (dict): The descriptor metadata for the model.
-            - zip_path (str): The file path to the created ZIP package.
+        Response: A streaming Flask response.
     """
-    from datetime import datetime
-    import json
-    model_folder = os.path.join(UPLOAD_FOLDER, secure_filename(model_name))
-    release_folder = os.path.join(model_folder, "release")
-    src_folder = os.path.join(model_folder, "src")
-    web_app_folder = os.path.join(src_folder, "web_app")
-    inference_app_folder = os.path.join(src_folder, "inference_app")
-    
-    # Create necessary directories with absolute paths
-    os.makedirs(release_folder, exist_ok=True)
-    os.makedirs(src_folder, exist_ok=True)
-    os.makedirs(web_app_folder, exist_ok=True)
-    os.makedirs(inference_app_folder, exist_ok=True)
-    
-    # Log the absolute paths being used
-    print(f"Model folder: {model_folder}")
-    print(f"Release folder: {release_folder}")
-    print(f"Web app folder: {web_app_folder}")
-    print(f"Inference app folder: {inference_app_folder}")
+    from flask import stream_with_context
 
-    # Extract web app zip
-    web_app_path = os.path.join(web_app_folder, "web_app.zip")
-    web_app_zip.save(web_app_path)
-    with zipfile.ZipFile(web_app_path, "r") as zip_ref:
-        zip_ref.extractall(web_app_folder)
-    
-    # Extract inference app zip
-    inference_app_path = os.path.join(inference_app_folder, "inference_app.zip")
-    inference_app_zip.save(inference_app_path)
-    with zipfile.ZipFile(inference_app_path, "r") as zip_ref:
-        zip_ref.extractall(inference_app_folder)
-    
-    # Read requirements from both apps - FIX: Improved requirement file reading
-    web_app_requirements = []
-    inference_app_requirements = []
-    
-    # Check for requirements.txt in web_app folder
-    web_app_req_path = os.path.join(web_app_folder, "requirements.txt")
-    if os.path.exists(web_app_req_path):
-        with open(web_app_req_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    # Strip version specifiers to get base package name
-                    package = re.split(r'[=<>]', line)[0].strip()
-                    if package:
-                        web_app_requirements.append(package)
-        print(f"Web app requirements: {web_app_requirements}")
-    else:
-        print(f"Warning: requirements.txt not found in {web_app_folder}")
-    
-    # Check for requirements.txt in inference_app folder
-    inference_app_req_path = os.path.join(inference_app_folder, "requirements.txt")
-    if os.path.exists(inference_app_req_path):
-        with open(inference_app_req_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    # Strip version specifiers to get base package name
-                    package = re.split(r'[=<>]', line)[0].strip()
-                    if package:
-                        inference_app_requirements.append(package)
-        print(f"Inference app requirements: {inference_app_requirements}")
+    headers = {key: value for key, value in request.headers if key.lower() not in HOP_BY_HOP_HEADERS}
+    if request.content_length is not None:
+        body = _RequestBodyStream(request.stream, request.content_length) if request.content_length else None
     else:
-        print(f"Warning: requirements.txt not found in {inference_app_folder}")
-    
-    # Combine unique requirements from both apps
-    all_requirements = list(set(web_app_requirements + inference_app_requirements))
-    
-    # Find model weights files
-    model_weights = []
-    for root, _, files in os.walk(inference_app_folder):
-        for file in files:
-            if file.endswith((".pt", ".pth", ".onnx", ".h5")):
-                rel_path = os.path.relpath(os.path.join(root, file), inference_app_folder)
-                model_weights.append(rel_path)
+        headers.pop("Content-Length", None)
+        body = _chunked_body(request.stream)
 
-    # Create descriptor with comprehensive metadata including absolute paths
-    descriptor = {
-        "model_name": model_name,
-        "version": request.form.get("version", "1.0"),
-        "created_at": datetime.now().isoformat(),
-        "author": request.form.get("author", "Unknown"),
-        "description": request.form.get("description", f"Model {model_name}"),
-        "project_root": PROJECT_ROOT,
-        "paths": {
-            "model_folder": model_folder,
-            "release_folder": release_folder,
-            "web_app_folder": web_app_folder,
-            "inference_app_folder": inference_app_folder
-        },
-        "files": {
-            "web_app_folder": "web_app",
-            "inference_app_folder": "inference_app",
-            "model_weights": model_weights
-        },
-        "requirements": {
-            "combined": all_requirements,
-            "web_app": web_app_requirements,
-            "inference_app": inference_app_requirements
-        },
-        "interface_type": "dual",  # Indicates both web and inference apps
-        "app_relationship": {
-            "web_app": "frontend",
-            "inference_app": "api_backend"
-        },
-        "instances": [],  # Will store info about instances, not just ports
-        "api_endpoints": {
-            "predict": {
-                "method": "POST",
-                "description": "Make predictions using the model",
-                "parameters": "Depends on the specific model implementation"
-            },
-            "health": {
-                "method": "GET",
-                "description": "Check if the API is running properly"
-            }
-        }
-    }
+    try:
+        resp = get_proxy_session(instance).request(
+            method=request.method,
+            url=f"http://localhost:{instance['port']}/{subpath}",
+            params=request.args.to_dict(flat=False),
+            headers=headers,
+            data=body,
+            allow_redirects=False,
+            stream=True,
+            timeout=(PROXY_CONNECT_TIMEOUT, PROXY_READ_TIMEOUT)
+        )
+    except requests.exceptions.Timeout as e:
+        if on_complete:
+            on_complete(False)
+        return jsonify({"error": f"Upstream timeout: {e}"}), 504
+    except requests.exceptions.RequestException as e:
+        if on_complete:
+            on_complete(False)
+        return jsonify({"error": f"Upstream error: {e}"}), 502
 
-    # Save descriptor.json in each app folder and release folder
-    descriptor_path = os.path.join(release_folder, "descriptor.json")
-    with open(descriptor_path, 'w') as f:
-        json.dump(descriptor, f, indent=4)
-        
-    # Also save copies in web_app and inference_app folders for reference
-    with open(os.path.join(web_app_folder, "descriptor.json"), 'w') as f:
-        json.dump(descriptor, f, indent=4)
-        
-    with open(os.path.join(inference_app_folder, "descriptor.json"), 'w') as f:
-        json.dump(descriptor, f, indent=4)
+    # The body is relayed undecoded, so Content-Encoding/Length stay valid
+    response_headers = [
+        (name, value) for name, value in resp.raw.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    ]
 
-    # Create final zip package for the whole model
-    zip_filename = f"{secure_filename(model_name)}.zip"
-    zip_path = os.path.join(release_folder, zip_filename)
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        # Add descriptor.json at the root level of the ZIP
-        zipf.write(descriptor_path, arcname="descriptor.json")
-        
-        # Add web app files, including requirements.txt
-        for root, _, files in os.walk(web_app_folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.join("web_app", os.path.relpath(file_path, web_app_folder))
-                zipf.write(file_path, arcname=arcname)
-                
-        # Add inference app files, including requirements.txt
-        for root, _, files in os.walk(inference_app_folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.join("inference_app", os.path.relpath(file_path, inference_app_folder))
-                zipf.write(file_path, arcname=arcname)
-                
-    return descriptor, zip_path
+    finished = []
+
+    def finish():
+        # Returns the connection to the pool and releases the instance. The
+        # WSGI server never iterates bodyless replies (HEAD, 204, 304), so
+        # this also runs from the response's close, not only from relay()
+        if finished:
+            return
+        finished.append(True)
+        resp.close()
+        if on_complete:
+            on_complete(resp.status_code not in INSTANCE_FAILURE_STATUSES)
+
+    def relay():
+        try:
+            for chunk in resp.raw.stream(PROXY_CHUNK_SIZE, decode_content=False):
+                yield chunk
+        finally:
+            finish()
+
+    response = Response(stream_with_context(relay()), resp.status_code, response_headers, direct_passthrough=True)
+    response.call_on_close(finish)
+    return response
 
 #############################################
 # Flask Routes                              #
@@ -649,7 +2990,9 @@ def index():
     Returns:
         Response: The rendered HTML template for the home page.
     """
-    return render_template("index.html")
+    return render_template("index.html",
+                          prefetch_wheels_default=PREFETCH_WHEELS_DEFAULT,
+                          warm_pool_defaults=WARM_POOL_DEFAULTS)
 
 @app.route("/upload", methods=["POST"])
 def upload_model():
@@ -672,11 +3015,40 @@ def upload_model():
     if web_app_file.filename == "" or inference_app_file.filename == "":
         return "One or more files were not selected", 400
 
-    descriptor, zip_path = package_model(model_name, web_app_file, inference_app_file)
+    try:
+        warm_pool_form_config(request.form)
+    except ValueError as e:
+        return str(e), 400
+
+    upload = {
+        "web_app_sha256": upload_sha256(web_app_file),
+        "inference_app_sha256": upload_sha256(inference_app_file),
+        "form": {field: request.form.get(field) for field in PACKAGE_FORM_FIELDS},
+    }
+    descriptor, zip_path = load_release(secure_filename(model_name))
+    if descriptor is not None and descriptor.get("upload") == upload:
+        print(f"Upload of {model_name} is unchanged ({upload['inference_app_sha256'][:12]}), reusing {zip_path}")
+        model_data = app_servers.get(model_name, {})
+        if any(is_instance_alive(i) for i in model_data.get("web_apps", []) + model_data.get("inference_apps", [])):
+            return render_template("deployment_status.html",
+                                  model_name=model_name,
+                                  descriptor=descriptor,
+                                  message="Model is unchanged and already deployed.",
+                                  redirect_url=url_for('model_specific', model_name=model_name),
+                                  redirect_seconds=1)
+    else:
+        descriptor, zip_path = package_model(model_name, web_app_file, inference_app_file, upload)
+        # Routing and the warm pool read the cached descriptor of a deployed model
+        if model_name in app_servers:
+            app_servers[model_name]["model_info"].update(descriptor=descriptor, zip_path=zip_path)
     
-    # Start deployment in background thread
+    # Start deployment in background thread, optionally prefetching wheels first
+    # The form sends a hidden 0 followed by the checkbox's 1 when checked; the
+    # env default only applies to clients that leave the field out entirely
+    prefetch_values = request.form.getlist("prefetch_wheels")
+    prefetch = prefetch_values[-1] in ("1", "on", "true") if prefetch_values else PREFETCH_WHEELS_DEFAULT
     threading.Thread(
-        target=deploy_in_background, 
+        target=prefetch_and_deploy if prefetch else deploy_in_background, 
         args=(model_name, zip_path, descriptor)
     ).start()
     
@@ -752,13 +3124,13 @@ def model_specific(model_name):
             instance for instance in app_servers[model_name]["web_apps"]
             if not instance["deploying"] and instance["status"] == "running"
         ]
-        web_instance = random.choice(web_candidates) if web_candidates else None
+        web_instance = choose_instance(model_name, web_candidates)
 
         inf_candidates = [
             instance for instance in app_servers[model_name]["inference_apps"]
             if not instance["deploying"] and instance["status"] == "running"
         ]
-        inf_instance = random.choice(inf_candidates) if inf_candidates else None
+        inf_instance = choose_instance(model_name, inf_candidates)
         
         # If we have a web app, show it
         if web_instance:
@@ -897,12 +3269,6 @@ def instances_model(model_name):
             instance_id = instance["id"]
             # Use absolute path for app directory
             app_dir = instance.get("app_dir") or os.path.join(PROJECT_ROOT, "deployed_models", model_name, f"web_app_{instance_id}")
-            log_file = os.path.join(app_dir, "app.log")
-            logs = ""
-            
-            if os.path.exists(log_file):
-                with open(log_file, "r") as f:
-                    logs = f.read()
             
             instances.append({
                 "instance_id": instance_id,
@@ -911,7 +3277,7 @@ def instances_model(model_name):
                 "url": instance["url"],
                 "status": instance["status"],
                 "deployed_at": instance["created_at"],
-                "logs": logs,
+                "logs_url": url_for("instance_logs", model_name=model_name, instance_id=instance_id),
                 "app_dir": app_dir  # Include absolute path in instance data
             })
         
@@ -919,13 +3285,6 @@ def instances_model(model_name):
         for instance in app_servers[model_name]["inference_apps"]:
             instance_id = instance["id"]
             # Use absolute path for app directory
-            app_dir = instance.get("app_dir") or os.path.join(PROJECT_ROOT, "deployed_models", model_name, f"inference_app_{instance_id}")
-            log_file = os.path.join(app_dir, "app.log")
-            logs = ""
-            
-            if os.path.exists(log_file):
-                with open(log_file, "r") as f:
-                    logs = f.read()
             
             instances.append({
                 "instance_id": instance_id,
@@ -934,7 +3293,7 @@ def instances_model(model_name):
                 "url": instance["url"],
                 "status": instance["status"],
                 "deployed_at": instance["created_at"],
-                "logs": logs,
+                "logs_url": url_for("instance_logs", model_name=model_name, instance_id=instance_id),
             })
 
     return render_template("instances.html", 
@@ -943,6 +3302,67 @@ def instances_model(model_name):
                         descriptor=descriptor,
                         is_dual_app=True)
 
+@app.route("/model/<model_name>/logs/<instance_id>", methods=["GET"])
+def instance_logs(model_name, instance_id):
+    """
+    Serves part of an instance's app.log without reading the whole file.
+
+    Query parameters:
+        offset (int): Byte offset to read from.
+        limit (int): Maximum number of bytes to return (default 64 KiB).
+        tail (int): Return the last N lines instead (default when no offset);
+            0 returns no data, with next_offset at the end of the log.
+        follow (1): Stream appended lines as server-sent events, starting at
+            Last-Event-ID, at offset, or at the current end of the log.
+
+    Returns:
+        Response: JSON with data, offset, next_offset and size, or an
+            event stream in follow mode.
+    """
+    instance = next(
+        (i for i in app_servers.get(model_name, {}).get("web_apps", []) + app_servers.get(model_name, {}).get("inference_apps", [])
+         if i["id"] == instance_id),
+        None
+    )
+    if instance is None:
+        return jsonify({"error": f"Instance {instance_id} not found"}), 404
+    app_type = "web_app" if instance in app_servers[model_name]["web_apps"] else "inference_app"
+    app_dir = instance.get("app_dir") or os.path.join(PROJECT_ROOT, "deployed_models", model_name, f"{app_type}_{instance_id}")
+    log_file = os.path.join(app_dir, "app.log")
+    
+    try:
+        limit = min(max(int(request.args.get("limit", LOG_READ_DEFAULT_BYTES)), 1), LOG_READ_MAX_BYTES)
+        # An EventSource reconnects to the URL it was opened with, offset
+        # included, so the Last-Event-ID it sends along takes precedence
+        offset = request.headers.get("Last-Event-ID") or request.args.get("offset")
+        offset = max(int(offset), 0) if offset is not None else None
+        tail = max(int(request.args.get("tail", 100)), 0)
+    except ValueError:
+        return jsonify({"error": "offset, limit and tail must be integers"}), 400
+    
+    if request.args.get("follow") == "1":
+        from flask import stream_with_context
+        if offset is None:
+            offset = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+        return Response(
+            stream_with_context(follow_log(log_file, offset)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    if offset is None:
+        data, start, size = read_log_tail(log_file, tail, limit)
+    else:
+        data, start, size = read_log_range(log_file, offset, limit)
+    
+    return jsonify({
+        "instance_id": instance_id,
+        "offset": start,
+        "next_offset": start + len(data),
+        "size": size,
+        "data": data.decode("utf-8", errors="replace")
+    })
+
 @app.route("/model/<model_name>/create_instance", methods=["POST"])
 def create_model_instance(model_name):
     """
@@ -963,6 +3383,22 @@ def create_model_instance(model_name):
     with open(descriptor_path, 'r') as f:
         descriptor = json.load(f)
     
+    # Optional preforked worker count for this inference instance
+    workers = request.form.get("workers", "").strip()
+    if app_type == "inference_app" and workers:
+        if not workers.isdigit() or int(workers) < 1:
+            return "Invalid workers. Must be a positive integer.", 400
+        import copy
+        descriptor = copy.deepcopy(descriptor)
+        descriptor.setdefault("instance_workers", {})[app_type] = int(workers)
+    
+    # Optional int8 serving variant for this inference instance
+    quantization = request.form.get("quantization", "").strip()
+    if app_type == "inference_app" and quantization:
+        if quantization not in ("none", "dynamic", "static"):
+            return "Invalid quantization. Must be 'none', 'dynamic' or 'static'.", 400
+        descriptor = with_instance_env(descriptor, app_type, {"QUANTIZATION": quantization})
+    
     # Check if deployment is already in progress
     lock_key = f"{model_name}_{app_type}"
     if lock_key in deployment_locks and deployment_locks[lock_key]:
@@ -988,6 +3424,80 @@ def create_model_instance(model_name):
                       redirect_url=url_for('instances_model', model_name=model_name),
                       redirect_seconds=5)
 
+@app.route("/model/<model_name>/scale", methods=["POST"])
+def scale_model(model_name):
+    """
+    Scales a model's app types to a desired number of replicas, e.g.
+    {"inference_app": 10} as JSON, or app_type/replicas form fields.
+    The counts are recorded in the model's registry entry, so the warm pool
+    and supervisor keep to them, and the instances are started or stopped
+    in the background; returns 202 right away.
+    """
+    if model_name not in os.listdir(UPLOAD_FOLDER):
+        return jsonify({"error": "Model not found"}), 404
+    
+    if request.is_json:
+        targets = request.get_json(silent=True) or {}
+        if not isinstance(targets, dict):
+            return jsonify({"error": "Expected a JSON object of app type to replicas"}), 400
+    else:
+        targets = {request.form.get("app_type", "inference_app"): request.form.get("replicas", "")}
+    
+    desired = {}
+    for app_type, replicas in targets.items():
+        if app_type not in ["web_app", "inference_app"]:
+            return jsonify({"error": f"Invalid app type {app_type}"}), 400
+        # Whole numbers only: int() would also take 2.7 or true
+        if isinstance(replicas, bool) or not isinstance(replicas, (int, str)):
+            return jsonify({"error": f"Invalid replicas for {app_type}"}), 400
+        try:
+            replicas = int(replicas)
+        except ValueError:
+            return jsonify({"error": f"Invalid replicas for {app_type}"}), 400
+        if not 0 <= replicas <= SCALE_MAX_REPLICAS:
+            return jsonify({"error": f"Replicas must be between 0 and {SCALE_MAX_REPLICAS}"}), 400
+        desired[app_type] = replicas
+    if not desired:
+        return jsonify({"error": "No replicas given"}), 400
+    
+    descriptor, zip_path = load_release(model_name)
+    if descriptor is None:
+        return jsonify({"error": "Model not found or not properly packaged"}), 404
+    
+    with registry_lock:
+        model_data = app_servers.setdefault(model_name, {
+            "web_apps": [],
+            "inference_apps": [],
+            "model_info": {"descriptor": descriptor, "zip_path": zip_path}
+        })
+        model_data["model_info"].setdefault("replicas", {}).update(desired)
+    
+    def scale():
+        # Inference apps first, so new web apps can find a running API
+        for app_type in sorted(desired, key=lambda t: t != "inference_app"):
+            for _ in range(10):
+                # A newer scale request supersedes this one
+                replicas = requested_replicas(model_name, app_type)
+                try:
+                    result = scale_instances(model_name, zip_path, descriptor, app_type, replicas)
+                    if result["errors"]:
+                        print(f"Scaling {app_type} of {model_name} to {replicas}: {result['errors']}")
+                    break
+                except RuntimeError:
+                    time.sleep(SUPERVISOR_INTERVAL)  # another deployment holds the lock
+                except Exception as e:
+                    print(f"Error scaling {app_type} of {model_name} to {replicas}: {e}")
+                    break
+            else:
+                print(f"Gave up scaling {app_type} of {model_name} to {replicas}: deployment lock held")
+    
+    threading.Thread(target=scale, daemon=True).start()
+    return jsonify({
+        "model_name": model_name,
+        "replicas": desired,
+        "status_url": url_for('model_status', model_name=model_name)
+    }), 202
+
 @app.route("/model/<model_name>/stop_instance", methods=["POST"])
 def stop_instance(model_name):
     """
@@ -1010,12 +3520,7 @@ def stop_instance(model_name):
     for instance in app_servers[model_name][app_list_key]:
         if instance["id"] == instance_id:
             found = True
-            if instance["process"]:
-                try:
-                    instance["process"].terminate()
-                    instance["status"] = "stopped"
-                except:
-                    pass
+            terminate_instance(instance)
             break
     
     if not found:
@@ -1023,12 +3528,16 @@ def stop_instance(model_name):
     
     return redirect(url_for("instances_model", model_name=model_name))
 
-@app.route("/model/<model_name>/status", methods=["GET"])
-def model_status(model_name):
+def build_model_status(model_name):
     """
-    Returns the current deployment status for a model.
-    Used by the frontend to check if a model is being deployed.
-    Shows deploying status only when no running instances are available.
+    Builds the deployment status payload of a model. Shared by the Flask
+    status route and the async gateway.
+
+    Args:
+        model_name (str): The name of the model.
+
+    Returns:
+        dict: Model name, deploying flag and running instances.
     """
     status = {
         "model_name": model_name,
@@ -1072,6 +3581,7 @@ def model_status(model_name):
             (any(app["deploying"] for app in inf_apps) and not has_running_inference_app)
         )
         status["deploying"] = is_deploying
+        status["traffic"] = traffic_snapshot(model_name)
     
     # Check deployment locks, but only set deploying=True if we don't have running instances
     lock_key_web = f"{model_name}_web_app"
@@ -1082,61 +3592,97 @@ def model_status(model_name):
            (lock_key_inf in deployment_locks and deployment_locks[lock_key_inf]):
             status["deploying"] = True
     
-    return jsonify(status)
+    return status
+
+@app.route("/model/<model_name>/status", methods=["GET"])
+def model_status(model_name):
+    """
+    Returns the current deployment status for a model.
+    Used by the frontend to check if a model is being deployed.
+    Shows deploying status only when no running instances are available.
+    """
+    return jsonify(build_model_status(model_name))
+
+@app.route("/venv_cache/stats", methods=["GET"])
+def venv_cache_status():
+    """
+    Returns venv cache hit/build counters and the cached environments.
+    """
+    entries = []
+    if os.path.isdir(VENV_CACHE_DIR):
+        in_use = venvs_in_use()
+        for key in sorted(os.listdir(VENV_CACHE_DIR)):
+            marker = os.path.join(VENV_CACHE_DIR, key, ".complete")
+            if not os.path.exists(marker):
+                continue
+            meta = {}
+            try:
+                with open(os.path.join(VENV_CACHE_DIR, key, ".cache_meta.json"), "r") as f:
+                    meta = json.load(f)
+            except Exception:
+                pass
+            entries.append({
+                "key": key,
+                "size_bytes": meta.get("size_bytes"),
+                "requirements": meta.get("requirements", []),
+                "built_at": meta.get("built_at"),
+                "last_used": datetime.datetime.fromtimestamp(os.path.getmtime(marker)).isoformat(),
+                "in_use": key in in_use
+            })
+
+    lookups = venv_cache_stats["hits"] + venv_cache_stats["builds"]
+    return jsonify({
+        **venv_cache_stats,
+        "hit_rate": round(venv_cache_stats["hits"] / lookups, 3) if lookups else None,
+        "max_bytes": VENV_CACHE_MAX_BYTES,
+        "max_entries": VENV_CACHE_MAX_ENTRIES,
+        "total_bytes": sum(e["size_bytes"] or 0 for e in entries),
+        "entries": entries
+    })
 
 @app.route("/model/<model_name>/<path:subpath>", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 def proxy_model_api(model_name, subpath):
     """
     Proxies API requests to an available inference API backend instance.
     """
-    from flask import jsonify
-    import random
-
     # Check if any inference APIs are available
-    available_instance = None
+    available_instance = select_inference_instance(model_name)
 
-    if model_name in app_servers:
-        available_instances = [
-            instance
-            for instance in app_servers[model_name]["inference_apps"]
-            if not instance["deploying"] and instance["status"] == "running"
-        ]
-        if available_instances:
-            available_instance = random.choice(available_instances)
+    # A pool or manual deployment already running will be ready sooner than a new one
+    if not available_instance and is_inference_deploying(model_name):
+        warm_pool_wakeup.set()
+        available_instance = wait_for_routable_instance(model_name, PROXY_DEPLOY_WAIT_SECONDS)
 
-    # If no instance available, try to deploy one
+    # A model scaled to zero comes back by restarting a suspended instance,
+    # otherwise deploy a new one; either way wait until it passes readiness
     if not available_instance:
-        descriptor_path = os.path.join(UPLOAD_FOLDER, model_name, "release/descriptor.json")
-        zip_path = os.path.join(UPLOAD_FOLDER, model_name, "release", f"{model_name}.zip")
+        if resume_model(model_name) is None:
+            try:
+                descriptor, zip_path = load_release(model_name)
+            except Exception as e:
+                return jsonify({"error": f"{str(e)}"}), 500
+            if descriptor is None:
+                return jsonify({"error": "Model not found or not properly packaged"}), 404
 
-        if not os.path.exists(descriptor_path) or not os.path.exists(zip_path):
-            return jsonify({"error": "Model not found or not properly packaged"}), 404
+            try:
+                deploy_instance(model_name, zip_path, descriptor, "inference_app")
+            except Exception as e:
+                return jsonify({"error": f"{str(e)}"}), 500
+        available_instance = wait_for_routable_instance(model_name, PROXY_DEPLOY_WAIT_SECONDS)
+        if not available_instance:
+            return jsonify({"error": "No inference instance became ready"}), 503
 
-        try:
-            with open(descriptor_path, 'r') as f:
-                descriptor = json.load(f)
-            available_instance = deploy_instance(model_name, zip_path, descriptor, "inference_app")
-        except Exception as e:
-            return jsonify({"error": f"{str(e)}"}), 500
-
-    # Make the request to the inference API
-    port = available_instance["port"]
-    target_url = f"http://localhost:{port}/{subpath}"
-
-    resp = requests.request(
-        method=request.method,
-        url=target_url,
-        params=dict(request.args),
-        headers={key: value for key, value in request.headers if key != "Host"},
-        data=request.get_data(),
-        cookies=request.cookies,
-        allow_redirects=False
+    # Stream the request to the inference API; the instance stays in flight
+    # until the response body has been relayed
+    started = acquire_instance(available_instance)
+    return forward_request(
+        available_instance, subpath,
+        on_complete=lambda success: release_instance(available_instance, started, success)
     )
 
-    excluded_headers = ["content-encoding", "content-length", "transfer-encoding", "connection"]
-    headers = [(name, value) for name, value in resp.raw.headers.items() if name.lower() not in excluded_headers]
-
-    return Response(resp.content, resp.status_code, headers)
-
 if __name__ == "__main__":
+    start_warm_pool()
+    start_autoscaler()
+    start_idle_reaper()
+    start_supervisor()
     app.run(debug=True, port=5000, use_reloader=False)